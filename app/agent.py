@@ -1,20 +1,50 @@
 import asyncio
+import contextlib
+import io
+import re
 import sys
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TypedDict, Union
 from abc import ABC, abstractmethod
 from search import WebSearcher
 from rag import RAGProcessor
+from session_context import SessionContextStore
+from text_stats import TextStatistics, analyze_stream, iter_chunks, kmeans
+from generation_cache import GenerationCache, PrefixContext, is_deterministic
 from ollama import AsyncClient
 from config import config
 from langchain_core.documents import Document
 from langchain_ollama import OllamaLLM
 from utils.logging_service import LoggingService
+from utils.deadline import Deadline, DeadlineExceededError, run_within
+from utils.profiling import span
 
 # Configuration de l'encodage standard
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
+# Taille des extraits journalisés (prompts, réponses)
+LOG_SAMPLE_LENGTH = 200
+
+class SourceSection(TypedDict):
+    """Source citée dans une réponse structurée"""
+    title: str
+    url: str
+    excerpt: Optional[str]
+
+class StructuredResponse(TypedDict):
+    """Réponse de recherche en sections typées (format 'structured')"""
+    synthesis: str
+    sources: List[SourceSection]
+    urls: List[str]
+    error: Optional[str]
+
+# markdown : réponse complète, compact : sans extraits, structured : StructuredResponse
+RESPONSE_FORMATS = ("markdown", "compact", "structured")
+
+# Mot (suite de caractères non blancs) pour la normalisation des extraits
+_WORD_RE = re.compile(r"\S+")
+
 class BaseAgent(ABC):
     """
     Classe abstraite de base pour tous les agents.
@@ -42,19 +72,33 @@ class BaseAgent(ABC):
             message="Résultat de requête",
             module=self.__class__.__name__,
             metadata={
-                "prompt": prompt,
+                "prompt": prompt[:LOG_SAMPLE_LENGTH],
                 "response_length": len(response),
-                "response_sample": response[:1000] + "..." if len(response) > 1000 else response
+                "response_sample": response[:LOG_SAMPLE_LENGTH]
             }
         )
 
     @abstractmethod
-    async def query(self, prompt: str) -> str:
+    async def query(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
         """Méthode abstraite à implémenter par les sous-classes"""
         pass
 
+    def stats(self) -> Dict[str, Any]:
+        """Indicateurs propres à l'agent (caches, réutilisation de contexte)"""
+        return {}
+
+# Instruction fixe placée en tête de chaque prompt de synthèse
+SUMMARY_PREFIX = "Fait la synthèse en langue française, du contenu de ces sources:\n\n"
+
 class Summarizer:
-    """Service dédié à la génération de résumés avec le modele LLM via Ollama"""
+    """
+    Service dédié à la génération de résumés avec le modele LLM via Ollama.
+    
+    Le modèle est maintenu chargé (OLLAMA_KEEP_ALIVE) et l'instruction fixe
+    reste en tête du prompt, ce qui permet à Ollama de réutiliser son cache
+    KV pour ce préfixe. Avec SUMMARY_PREFIX_CONTEXT, le préfixe est évalué
+    une seule fois et son `context` Ollama est transmis aux appels suivants.
+    """
     
     def __init__(self, model: str = config.OLLAMA_MODEL):
         """Initialise le summarizer avec le modèle spécifié"""
@@ -66,37 +110,61 @@ class Summarizer:
             "num_predict": config.OLLAMA_MODEL_MAX_TOKENS,
             "top_p": config.OLLAMA_MODEL_TOP_P
         }
+        self.prefix = PrefixContext(SUMMARY_PREFIX)
 
-    async def summarize(self, text: str) -> str:
+    async def summarize(self, text: str, deadline: Optional[Deadline] = None) -> str:
         """
         Génère un résumé concis en français du texte fourni
         
         Args:
             text: Texte à résumer
+            deadline: Échéance de la requête; la génération est interrompue à expiration
             
         Returns:
             Le résumé généré ou une chaîne vide en cas d'erreur
+            
+        Raises:
+            DeadlineExceededError: Si l'échéance interrompt la génération
         """
         # prompt = f"Génère un résumé concis en français de ce contenu:\n\n{text}"
-        self.last_prompt = f"Fait la synthèse en langue française, du contenu de ces sources:\n\n{text}"
+        self.last_prompt = SUMMARY_PREFIX + text
         try:
-            response = await self.client.generate(
-                model=self.model,
-                prompt=self.last_prompt,
-          #      prompt=prompt,
-                options=self.model_options
-            )
+            if config.SUMMARY_PREFIX_CONTEXT:
+                response = await run_within(self._generate_with_prefix(text), deadline)
+            else:
+                response = await run_within(
+                    self.client.generate(
+                        model=self.model,
+                        prompt=self.last_prompt,
+                  #      prompt=prompt,
+                        options=self.model_options,
+                        keep_alive=config.OLLAMA_KEEP_ALIVE
+                    ),
+                    deadline
+                )
+                self.prefix.record(response, reused=False)
             
             self.logger.info(
                 "Résumé généré avec succès",
                 extra={
                     "model": self.model,
                     "input_length": len(text),
-                    "output_length": len(response['response'])
+                    "output_length": len(response['response']),
+                    "prompt_eval_count": response.get('prompt_eval_count'),
+                    "prefill_ms": round((response.get('prompt_eval_duration') or 0) / 1e6, 1)
                 }
             )
             return response['response']
             
+        except DeadlineExceededError:
+            self.logger.warning(
+                "Échéance atteinte pendant la génération du résumé",
+                extra={
+                    "model": self.model,
+                    "input_length": len(text)
+                }
+            )
+            raise
         except Exception as error:
             self.logger.error(
                 "Échec de la génération de résumé",
@@ -104,66 +172,167 @@ class Summarizer:
                 extra={
                     "model": self.model,
                     "error": str(error),
-                    "prompt_sample": prompt[:200]
+                    "prompt_sample": self.last_prompt[:200]
                 }
             )
             return ""
 
+    async def _generate_with_prefix(self, text: str):
+        """Génère en réutilisant le contexte Ollama du préfixe fixe"""
+        reused = self.prefix.tokens is not None
+        if not reused:
+            # Évaluation unique du préfixe (un seul jeton généré)
+            primed = await self.client.generate(
+                model=self.model,
+                prompt=SUMMARY_PREFIX,
+                options={**self.model_options, "num_predict": 1},
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+            self.prefix.prime(primed)
+        
+        if self.prefix.tokens is None:
+            # Contexte non fourni par le serveur : prompt complet
+            response = await self.client.generate(
+                model=self.model,
+                prompt=self.last_prompt,
+                options=self.model_options,
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+        else:
+            try:
+                response = await self.client.generate(
+                    model=self.model,
+                    prompt=text,
+                    context=self.prefix.tokens,
+                    options=self.model_options,
+                    keep_alive=config.OLLAMA_KEEP_ALIVE
+                )
+            except Exception:
+                # Contexte rejeté (modèle rechargé ou changé) : le préfixe
+                # sera réévalué au prochain appel
+                self.prefix.invalidate()
+                raise
+        self.prefix.record(response, reused=reused and self.prefix.tokens is not None)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Réutilisation du préfixe et temps de prefill"""
+        return self.prefix.stats()
+
 class OllamaAgent(BaseAgent):
     """
     Agent principal combinant recherche web et RAG avec Ollama.
     
     Workflow:
-    1. Recherche web initiale
-    2. Traitement RAG des résultats
-    3. Génération de résumé synthétique
-    4. Formatage de la réponse finale
+    1. Récupération depuis le contexte de la session (questions de suivi)
+       puis depuis l'index persistant construit par ingest.py
+    2. Recherche web initiale si le contexte est insuffisant
+    3. Traitement RAG des résultats
+    4. Génération de résumé synthétique
+    5. Formatage de la réponse finale (markdown, compact ou structured)
     """
     
+    # Longueur des extraits de sources (prompt de synthèse et réponse)
+    EXCERPT_LENGTH = 800
+    
     def __init__(self):
         super().__init__()
         self.searcher = WebSearcher()
         self.rag = RAGProcessor()
         self.summarizer = Summarizer()
+        self.sessions = SessionContextStore()
+        self.local_index = self.rag.load_index() if config.FAISS_USE_LOCAL_INDEX else None
 
-    async def query(self, prompt: str) -> str:
+    async def query(self,
+                    prompt: str,
+                    deadline: Optional[Deadline] = None,
+                    session_id: Optional[str] = None,
+                    response_format: str = "markdown") -> Union[str, StructuredResponse]:
         """
         Traite une requête utilisateur et retourne une réponse enrichie
         
         Args:
             prompt: La requête de l'utilisateur
+            deadline: Échéance de bout en bout; la recherche n'en consomme
+                qu'une fraction (SEARCH_BUDGET_RATIO) pour laisser du temps au résumé
+            session_id: Identifiant de session MCP; les documents déjà
+                récupérés dans la session sont réutilisés avant toute recherche web
+            response_format: "markdown" (synthèse, extraits et URLs), "compact"
+                (synthèse et liste des sources, sans extraits) ou "structured"
+                (dictionnaire StructuredResponse)
             
         Returns:
             Réponse formatée avec sources ou message d'erreur
         """
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(f"Format de réponse non supporté: {response_format}")
+        deadline = deadline or Deadline(config.REQUEST_DEADLINE)
         try:
-            self.logger.info("Début du traitement", extra={"prompt": prompt})
+            self.logger.info("Début du traitement", extra={"prompt": prompt, "session_id": session_id})
             
-            # 1. Recherche initiale
-            initial_summary, docs = await self.searcher.execute(prompt)
-            if not docs:
-                self._log_query_result(prompt, initial_summary)
-                return initial_summary
-              
-            # 2. Traitement RAG
-            vectorstore = await self.rag.create_from_documents(docs)
-            relevant_docs = await self.rag.similarity_search(
-                query=prompt,
-                vectorstore=vectorstore,
-                k=config.RAG_RESULTS
-            )
+            # 1. Contexte de session, puis index persistant
+            initial_summary = ""
+            with span("session_context"):
+                relevant_docs = await self._retrieve_from_session(prompt, session_id)
+            if relevant_docs is None and self.local_index is not None:
+                with span("local_index"):
+                    relevant_docs = await self._retrieve_covered(prompt, self.local_index)
             
-            # 3. Formatage des sources
-            sources_content, sources_used = self._format_sources(relevant_docs)
+            if relevant_docs is None:
+                # 2. Recherche initiale
+                with span("web_search"):
+                    initial_summary, docs = await self.searcher.execute(
+                        prompt,
+                        deadline=deadline.sub(config.SEARCH_BUDGET_RATIO)
+                    )
+                if not docs:
+                    # Aucune source : message de la recherche (délai dépassé, erreur)
+                    self._log_query_result(prompt, initial_summary)
+                    if response_format == "structured":
+                        return StructuredResponse(synthesis="", sources=[], urls=[], error=initial_summary)
+                    return initial_summary
+                  
+                # 3. Traitement RAG
+                with span("rag_index"):
+                    vectorstore = await self._index_documents(docs, session_id)
+                relevant_docs = []
+                if vectorstore is not None:
+                    with span("rag_similarity"):
+                        async with self._session_lock(session_id):
+                            relevant_docs = await self.rag.similarity_search(
+                                query=prompt,
+                                vectorstore=vectorstore,
+                                k=config.RAG_RESULTS
+                            )
             
-            # 4. Génération du résumé
-            combined_content = initial_summary + "\n\n" + "\n".join(sources_content)
-            final_summary = await self.summarizer.summarize(combined_content)
+            # 4. Extraction des sources (extraits bornés à EXCERPT_LENGTH)
+            sources = self._collect_sources(relevant_docs)
+            sources_markdown = self._render_sources(sources)
             
-            # 5. Construction de la réponse finale
-            response = self._build_final_response(final_summary, sources_content, sources_used)
+            # 5. Génération du résumé (à l'échéance : sources sans synthèse, signalées)
+            notice = None
+            with span("summarize"):
+                try:
+                    final_summary = await self.summarizer.summarize(
+                        f"{initial_summary}\n\n{sources_markdown}", deadline=deadline
+                    )
+                except DeadlineExceededError as error:
+                    final_summary, notice = "", str(error)
             
-            self._log_query_result(prompt, response)
+            # 6. Construction de la réponse finale
+            response = self._build_final_response(
+                final_summary, sources, response_format, sources_markdown, notice=notice
+            )
+            
+            self._log_query_result(prompt, response if isinstance(response, str) else final_summary)
+            self.logger.info(
+                "Fin du traitement",
+                extra={
+                    "elapsed": round(deadline.elapsed(), 3),
+                    "sources_count": len(sources),
+                    "response_format": response_format
+                }
+            )
             return response
             
         except Exception as error:
@@ -175,54 +344,213 @@ class OllamaAgent(BaseAgent):
                     "error": str(error)
                 }
             )
-            return "Désolé, une erreur s'est produite. Veuillez réessayer."
+            message = "Désolé, une erreur s'est produite. Veuillez réessayer."
+            if response_format == "structured":
+                return StructuredResponse(synthesis="", sources=[], urls=[], error=message)
+            return message
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du résumé et des sessions actives"""
+        return {
+            "summarizer": self.summarizer.stats(),
+            "sessions": len(self.sessions)
+        }
+
+    async def _retrieve_from_session(self, prompt: str, session_id: Optional[str]) -> Optional[List[Document]]:
+        """
+        Cherche la réponse dans le contexte de la session
 
-    def _format_sources(self, docs: List[Document]) -> tuple:
-        """Formate les documents sources pour l'affichage"""
-        sources_content = []
-        sources_used = []
+        Returns:
+            Les documents pertinents si au moins SESSION_MIN_HITS fragments
+            atteignent SESSION_MIN_RELEVANCE, sinon None (recherche web requise)
+        """
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            return None
         
-        for doc in docs:
-            if not doc.metadata.get('error'):
-                content = ' '.join(doc.page_content.split())
-                sources_content.append(
-                    f"**Titre:** {doc.metadata.get('title', 'Sans titre')}\n"
-                    f"**URL:** {doc.metadata['source']}\n"
-                    f"**Contenu:**\n{content[:800]}...\n"
-                    f"{'-'*50}"
-                )
-                sources_used.append(doc.metadata['source'])
-                
-        return sources_content, sources_used
-
-    def _build_final_response(self, summary: str, sources: List[str], urls: List[str]) -> str:
-        """Construit la réponse finale structurée"""
-        return (
-            f"## Synthèse\n\n{summary}\n\n"
-            f"## Sources\n\n" + "\n\n".join(sources) +
-            f"\n\n### URLs:\n" + "\n".join(f"- {url}" for url in urls)
+        async with session.lock:
+            if session.vectorstore is None:
+                return None
+            return await self._retrieve_covered(prompt, session.vectorstore)
+
+    def _session_lock(self, session_id: Optional[str]):
+        """
+        Verrou de l'index de session : _index_documents l'enrichit sur place,
+        les lectures le prennent aussi pour ne pas chercher pendant un ajout.
+        Sans session (index éphémère), aucun verrou n'est nécessaire.
+        """
+        session = self.sessions.get(session_id) if session_id else None
+        return session.lock if session is not None else contextlib.nullcontext()
+
+    async def _retrieve_covered(self, prompt: str, vectorstore) -> Optional[List[Document]]:
+        """
+        Recherche dans un index existant (session ou index persistant)
+
+        Returns:
+            Les documents pertinents si au moins SESSION_MIN_HITS fragments
+            atteignent SESSION_MIN_RELEVANCE, sinon None
+        """
+        scored = await self.rag.similarity_search_with_relevance(
+            query=prompt,
+            vectorstore=vectorstore,
+            k=config.RAG_RESULTS
+        )
+        relevant = [doc for doc, score in scored if score >= config.SESSION_MIN_RELEVANCE]
+        covered = len(relevant) >= min(config.SESSION_MIN_HITS, config.RAG_RESULTS)
+        
+        self.logger.info(
+            "Index existant consulté",
+            extra={
+                "relevant_count": len(relevant),
+                "covered": covered
+            }
         )
+        return relevant if covered else None
+
+    async def _index_documents(self, docs: List[Document], session_id: Optional[str]):
+        """
+        Indexe les documents récupérés; avec une session, ils sont ajoutés
+        à l'index de la session (sans doublon d'URL) qui est retourné.
+        Les pages en erreur ne sont pas indexées.
+        
+        Returns:
+            L'index, ou None si aucune page n'a pu être récupérée
+        """
+        loaded = [doc for doc in docs if not doc.metadata.get('error')]
+        if not session_id:
+            return await self.rag.create_from_documents(loaded) if loaded else None
+        
+        session = self.sessions.get_or_create(session_id)
+        async with session.lock:
+            new_docs = [doc for doc in loaded if doc.metadata['source'] not in session.sources]
+            if new_docs:
+                self.sessions.make_room(session, sum(len(doc.page_content) for doc in new_docs))
+                if session.vectorstore is None:
+                    session.vectorstore = await self.rag.create_from_documents(new_docs)
+                else:
+                    await self.rag.add_documents(session.vectorstore, new_docs)
+            
+            session.sources.update(doc.metadata['source'] for doc in new_docs)
+            session.text_size += sum(len(doc.page_content) for doc in new_docs)
+        
+        self.sessions.enforce_memory_cap()
+        return session.vectorstore
+
+    @classmethod
+    def _collect_sources(cls, docs: List[Document]) -> List[SourceSection]:
+        """Sources citées (documents en erreur exclus), avec un extrait normalisé de chacune"""
+        return [
+            SourceSection(
+                title=doc.metadata.get('title', 'Sans titre'),
+                url=doc.metadata['source'],
+                excerpt=cls._excerpt(doc.page_content, cls.EXCERPT_LENGTH)
+            )
+            for doc in docs
+            if not doc.metadata.get('error')
+        ]
+
+    @staticmethod
+    def _excerpt(text: str, length: int) -> str:
+        """
+        Début du texte, espaces normalisés, limité à `length` caractères.
+        Seuls les mots nécessaires sont lus : le reste de la page n'est pas copié.
+        """
+        words = []
+        size = 0
+        for match in _WORD_RE.finditer(text):
+            words.append(match.group())
+            size += len(words[-1]) + 1
+            if size > length:
+                break
+        return ' '.join(words)[:length]
+
+    @staticmethod
+    def _render_sources(sources: List[SourceSection]) -> str:
+        """Sources au format markdown (prompt de synthèse et réponse complète)"""
+        writer = io.StringIO()
+        for i, source in enumerate(sources):
+            if i:
+                writer.write("\n\n")
+            writer.write(f"**Titre:** {source['title']}\n")
+            writer.write(f"**URL:** {source['url']}\n")
+            writer.write(f"**Contenu:**\n{source['excerpt']}...\n")
+            writer.write('-' * 50)
+        return writer.getvalue()
+
+    @classmethod
+    def _build_final_response(cls,
+                              summary: str,
+                              sources: List[SourceSection],
+                              response_format: str = "markdown",
+                              sources_markdown: Optional[str] = None,
+                              notice: Optional[str] = None) -> Union[str, StructuredResponse]:
+        """
+        Construit la réponse finale dans le format demandé.
+        Plusieurs fragments d'une même page donnent plusieurs extraits, mais
+        une seule entrée dans `urls` et dans la liste compacte.
+        `notice` signale une synthèse interrompue (champ `error` en structured,
+        avertissement en tête de synthèse sinon).
+        """
+        titles = {}
+        for source in sources:
+            titles.setdefault(source['url'], source['title'])
+        urls = list(titles)
+        if response_format == "structured":
+            return StructuredResponse(synthesis=summary, sources=sources, urls=urls, error=notice)
+        
+        writer = io.StringIO()
+        writer.write("## Synthèse\n\n")
+        if notice:
+            writer.write(f"> ⚠️ {notice} : synthèse indisponible, sources récupérées ci-dessous.\n\n")
+        writer.write(f"{summary}\n\n## Sources\n\n")
+        if response_format == "compact":
+            for url, title in titles.items():
+                writer.write(f"- [{title}]({url})\n")
+            return writer.getvalue()
+        
+        writer.write(cls._render_sources(sources) if sources_markdown is None else sources_markdown)
+        writer.write("\n\n### URLs:\n")
+        writer.write("\n".join(f"- {url}" for url in urls))
+        return writer.getvalue()
 
 class AnalysisAgent(BaseAgent):
-    """Agent spécialisé dans l'analyse de texte"""
+    """
+    Agent spécialisé dans l'analyse de texte.
+
+    Les statistiques (mots, caractères, densité lexicale, n-grammes,
+    phrases) sont calculées en flux par morceaux de ANALYSIS_CHUNK_SIZE
+    caractères, hors de la boucle asyncio. L'analyse thématique par
+    embeddings est optionnelle (ANALYSIS_TOPICS ou paramètre `topics`).
+    """
     
     def __init__(self):
         super().__init__()
         self.rag = RAGProcessor()
     
-    async def query(self, text: str) -> str:
+    async def query(self, text: str, deadline: Optional[Deadline] = None, topics: Optional[bool] = None) -> str:
+        """
+        Analyse un texte et retourne un rapport markdown
+        
+        Args:
+            text: Texte à analyser
+            deadline: Échéance de la requête (analyse thématique uniquement)
+            topics: Active le regroupement thématique par embeddings
+                (par défaut : ANALYSIS_TOPICS)
+        """
         try:
-            doc = Document(page_content=text, metadata={"source": "user_input"})
-            await self.rag.create_from_documents([doc])
-            
-            response = (
-                f"## Analyse de texte\n\n"
-                f"Longueur: {len(text)} caractères\n"
-                f"Mots: {len(text.split())}\n"
-                f"Densité lexicale: {self._calculate_lexical_density(text):.1%}"
+            stats = await asyncio.to_thread(
+                analyze_stream,
+                iter_chunks(text, config.ANALYSIS_CHUNK_SIZE)
             )
+            sections = [self._format_statistics(stats)]
             
-            self._log_query_result(text, response)
+            if config.ANALYSIS_TOPICS if topics is None else topics:
+                clusters = await run_within(self._cluster_topics(text), deadline)
+                sections.append(self._format_topics(clusters))
+            
+            response = "\n\n".join(sections)
+            
+            self._log_query_result(text[:200], response)
             return response
             
         except Exception as error:
@@ -236,29 +564,94 @@ class AnalysisAgent(BaseAgent):
             )
             return f"Erreur lors de l'analyse: {str(error)}"
 
-    def _calculate_lexical_density(self, text: str) -> float:
-        """Calcule la densité lexicale (ratio mots uniques / total mots)"""
-        words = text.split()
-        if not words:
-            return 0.0
-        return len(set(words)) / len(words)
+    def _format_statistics(self, stats: TextStatistics) -> str:
+        """Formate les statistiques en markdown"""
+        lines = [
+            "## Analyse de texte\n",
+            f"Longueur: {stats.chars} caractères",
+            f"Mots: {stats.words}",
+            f"Mots uniques: {len(stats.word_counts)}",
+            f"Densité lexicale: {stats.lexical_density:.1%}",
+            f"Longueur moyenne des mots: {stats.word_chars / stats.words if stats.words else 0:.1f} caractères",
+            f"Phrases: {stats.sentences}",
+            f"Mots par phrase: moyenne {stats.sentence_mean:.1f}, écart-type {stats.sentence_stdev:.1f}, "
+            f"min {stats.sentence_min or 0}, max {stats.sentence_max}"
+        ]
+        
+        top_words = stats.top_words(config.ANALYSIS_TOP_N)
+        if top_words:
+            lines.append("\n### Mots fréquents\n")
+            lines.extend(f"- {word} ({count})" for word, count in top_words)
+        
+        for size in stats.ngram_sizes:
+            top_ngrams = stats.top_ngrams(size, config.ANALYSIS_TOP_N)
+            if top_ngrams:
+                lines.append(f"\n### Expressions fréquentes ({size} mots)\n")
+                lines.extend(f"- {gram} ({count})" for gram, count in top_ngrams)
+        
+        return "\n".join(lines)
+
+    async def _cluster_topics(self, text: str) -> List[List[str]]:
+        """
+        Regroupe les fragments du texte par thème (k-moyennes sur leurs embeddings)
+        
+        Returns:
+            Les fragments de chaque thème, du plus fourni au moins fourni
+        """
+        chunks = self.rag.split_text(text)
+        if len(chunks) > config.ANALYSIS_TOPICS_MAX_CHUNKS:
+            # Échantillonnage régulier pour borner le nombre d'embeddings
+            step = len(chunks) / config.ANALYSIS_TOPICS_MAX_CHUNKS
+            chunks = [chunks[int(i * step)] for i in range(config.ANALYSIS_TOPICS_MAX_CHUNKS)]
+        if not chunks:
+            return []
+        
+        vectors = await self.rag.embeddings.aembed_documents(chunks)
+        labels = kmeans(vectors, k=min(config.ANALYSIS_TOPICS_K, len(chunks)))
+        
+        clusters: Dict[int, List[str]] = {}
+        for chunk, label in zip(chunks, labels):
+            clusters.setdefault(int(label), []).append(chunk)
+        return sorted(clusters.values(), key=len, reverse=True)
+
+    def _format_topics(self, clusters: List[List[str]]) -> str:
+        """Décrit chaque thème par ses mots les plus fréquents"""
+        lines = ["## Thèmes\n"]
+        for index, chunks in enumerate(clusters, 1):
+            keywords = analyze_stream(chunks, ngram_sizes=()).top_words(5)
+            lines.append(
+                f"{index}. {', '.join(word for word, _ in keywords) or 'Sans mot-clé'} "
+                f"({len(chunks)} fragments)"
+            )
+        return "\n".join(lines)
 
 class GenerationAgent(BaseAgent):
-    """Agent spécialisé dans la génération de contenu avec LLM"""
+    """
+    Agent spécialisé dans la génération de contenu avec LLM.
+    
+    Les réponses sont mises en cache (LRU + expiration) lorsque la
+    température rend la génération déterministe.
+    """
     
     def __init__(self):
         super().__init__()
+        self.model_options = {
+            "temperature": config.OLLAMA_MODEL_TEMPERATURE,
+            "num_predict": config.OLLAMA_MODEL_MAX_TOKENS,
+            "top_p": config.OLLAMA_MODEL_TOP_P
+        }
         self.llm = OllamaLLM(
             model=config.OLLAMA_MODEL,
             base_url=config.OLLAMA_BASE_URL,
-            temperature=config.OLLAMA_MODEL_TEMPERATURE,
-            num_predict=config.OLLAMA_MODEL_MAX_TOKENS,
-            top_p=config.OLLAMA_MODEL_TOP_P
+            keep_alive=config.OLLAMA_KEEP_ALIVE,
+            **self.model_options
         )
+        self.cache = GenerationCache(config.GENERATION_CACHE_SIZE, config.GENERATION_CACHE_TTL)
+        self.cache_enabled = config.GENERATION_CACHE_SIZE > 0 and is_deterministic(self.model_options)
     
-    async def query(self, prompt: str) -> str:
+    async def query(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
         try:
-            response = await self.llm.ainvoke(prompt)
+            response = await self._generate(prompt, deadline)
             formatted_response = (
                 f"## Contenu généré\n\n{response}\n\n"
                 f"*Prompt original:*\n{prompt}"
@@ -267,6 +660,12 @@ class GenerationAgent(BaseAgent):
             self._log_query_result(prompt, formatted_response)
             return formatted_response
             
+        except DeadlineExceededError as error:
+            self.logger.warning(
+                "Échéance atteinte pendant la génération",
+                extra={"prompt": prompt[:LOG_SAMPLE_LENGTH]}
+            )
+            return f"Erreur lors de la génération: {error}"
         except Exception as error:
             self.logger.error(
                 "Échec de la génération",
@@ -278,6 +677,25 @@ class GenerationAgent(BaseAgent):
             )
             return f"Erreur lors de la génération: {str(error)}"
 
+    async def _generate(self, prompt: str, deadline: Optional[Deadline]) -> str:
+        """Génère la réponse, depuis le cache si la génération est déterministe"""
+        if not self.cache_enabled:
+            return await run_within(self.llm.ainvoke(prompt), deadline)
+        
+        key = GenerationCache.make_key(config.OLLAMA_MODEL, self.model_options, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.logger.info("Réponse servie depuis le cache", extra=self.cache.stats())
+            return cached
+        
+        response = await run_within(self.llm.ainvoke(prompt), deadline)
+        self.cache.put(key, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache de génération"""
+        return {"cache_enabled": self.cache_enabled, **self.cache.stats()}
+
 async def main():
     """Point d'entrée principal pour l'exécution en ligne de commande"""
     try:
@@ -1,7 +1,9 @@
-from typing import Dict, Type, Optional
+from typing import Any, Dict, Type, Optional, Union
 from agent import OllamaAgent, BaseAgent, AnalysisAgent, GenerationAgent
 import logging
 from utils.logging_service import LoggingService
+from utils.deadline import Deadline
+from utils.profiling import RequestProfiler
 
 class AgentOrchestrator:
     """
@@ -25,6 +27,7 @@ class AgentOrchestrator:
         """Initialise l'orchestrateur avec un cache vide d'instances d'agents"""
         self.logger = LoggingService().get_logger(self.__class__.__name__)
         self._agent_instances: Dict[str, BaseAgent] = {}  # Cache d'instances
+        self.profiler = RequestProfiler()
 
     def get_agent(self, agent_type: str) -> BaseAgent:
         """
@@ -55,13 +58,15 @@ class AgentOrchestrator:
         
         return self._agent_instances[agent_type]
 
-    async def process_query(self, query: str, agent_type: str = "search") -> str:
+    async def process_query(self, query: str, agent_type: str = "search", deadline: Optional[Deadline] = None, **options) -> Union[str, Dict[str, Any]]:
         """
         Traite une requête en la routant vers l'agent approprié
         
         Args:
             query: La requête à traiter
             agent_type: Le type d'agent à utiliser ('search' par défaut)
+            deadline: Échéance de bout en bout transmise à l'agent
+            **options: Paramètres propres à l'agent (ex: session_id, response_format pour 'search')
             
         Returns:
             La réponse générée par l'agent
@@ -73,14 +78,22 @@ class AgentOrchestrator:
             # Log de la requête entrante
             self._log_request(agent_type, query)
             
-            # Récupération et exécution de l'agent
+            # Récupération et exécution de l'agent (profilage optionnel)
             agent = self.get_agent(agent_type)
-            return await agent.query(query)
+            async with self.profiler.profile(agent_type, query):
+                return await agent.query(query, deadline=deadline, **options)
             
         except Exception as error:
             # Gestion centralisée des erreurs
             return self._handle_error(error, agent_type, query)
 
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Statistiques des agents instanciés (caches, réutilisation de contexte)"""
+        return {
+            agent_type: agent.stats()
+            for agent_type, agent in self._agent_instances.items()
+        }
+
     def _log_request(self, agent_type: str, query: str) -> None:
         """Journalise les détails d'une requête entrante"""
         LoggingService().log_structured(
@@ -0,0 +1,239 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+# Séparateurs par priorité décroissante (ceux de RecursiveCharacterTextSplitter) :
+# paragraphe, ligne, mot, puis caractère
+SEPARATORS = ("\n\n", "\n", " ", "")
+_NON_WHITESPACE_RE = re.compile(r"\S")
+
+
+class _Cuts:
+    """
+    Débuts des morceaux d'un segment [start, end) découpé par `separator`,
+    le séparateur restant en tête du morceau qu'il précède (comme re.split
+    avec keep_separator). Les coupures sont cherchées à la demande.
+    """
+
+    __slots__ = ("text", "separator", "step", "end", "positions")
+
+    def __init__(self, text: str, separator: str, start: int, end: int):
+        self.text = text
+        self.separator = separator
+        self.step = len(separator) or 1
+        self.end = end
+        # Séparateur de plusieurs caractères : occurrences sans chevauchement
+        # de gauche à droite, comme re.split (une par paragraphe, peu nombreuses)
+        self.positions = [
+            match.start() for match in re.compile(re.escape(separator)).finditer(text, start, end)
+        ] if len(separator) > 1 else None
+
+    def last(self, low: int, high: int) -> int:
+        """Dernière coupure dans ]low, high], ou -1"""
+        if not self.separator:
+            return high if high > low else -1
+        if self.positions is not None:
+            index = bisect_right(self.positions, high) - 1
+            return self.positions[index] if index >= 0 and self.positions[index] > low else -1
+        return self.text.rfind(self.separator, low + 1, high + 1)
+
+    def first(self, low: int) -> int:
+        """Première coupure à partir de `low`, ou fin du segment"""
+        if not self.separator:
+            return low
+        if self.positions is not None:
+            index = bisect_left(self.positions, low)
+            return self.positions[index] if index < len(self.positions) else self.end
+        position = self.text.find(self.separator, low, self.end)
+        return position if position >= 0 else self.end
+
+    def after(self, cut: int) -> int:
+        """Fin du morceau commençant à la coupure `cut`"""
+        return self.first(cut + self.step)
+
+
+class OffsetChunker:
+    """
+    Découpage par positions produisant les mêmes fragments que
+    RecursiveCharacterTextSplitter (séparateurs par défaut, séparateur
+    conservé, espaces de bord retirés).
+
+    Les morceaux (paragraphes, lignes, mots) ne sont pas énumérés : chaque
+    fragment est la plus longue suite de morceaux tenant dans chunk_size,
+    trouvée par str.rfind dans sa seule fenêtre, et le chevauchement
+    reprend les derniers morceaux tenant dans chunk_overlap. Le coût dépend
+    du nombre de fragments et non du nombre d'espaces du texte. Les
+    fragments sont des couples (début, fin) dans le texte source.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap doit être inférieur à chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @staticmethod
+    def _skip_whitespace(text: str, position: int, end: int) -> int:
+        match = _NON_WHITESPACE_RE.search(text, position, end)
+        return match.start() if match else end
+
+    @staticmethod
+    def _trim_end(text: str, start: int, end: int) -> int:
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return end
+
+    def _emit(self, text: str, start: int, end: int, chunk_starts: array, chunk_ends: array) -> None:
+        """Ajoute le fragment [start, end) sans ses espaces de bord (ignoré s'il est vide)"""
+        start = self._skip_whitespace(text, start, end)
+        end = self._trim_end(text, start, end)
+        if start < end:
+            chunk_starts.append(start)
+            chunk_ends.append(end)
+
+    def _split_segment(self, text: str, start: int, end: int, level: int,
+                       chunk_starts: array, chunk_ends: array) -> None:
+        """
+        Découpe le segment [start, end) avec le premier séparateur (à partir
+        de `level`) qu'il contient; un morceau trop long pour un fragment
+        est découpé au niveau suivant, sans chevauchement avec ses voisins.
+        """
+        for level in range(min(level, len(SEPARATORS) - 1), len(SEPARATORS)):
+            separator = SEPARATORS[level]
+            if not separator or text.find(separator, start, end) >= 0:
+                break
+        cuts = _Cuts(text, separator, start, end)
+
+        # `run` : début du fragment en cours, toujours une coupure
+        run = start
+        while run < end:
+            if end - run <= self.chunk_size:
+                self._emit(text, run, end, chunk_starts, chunk_ends)
+                return
+
+            cut = cuts.last(run, run + self.chunk_size)
+            if cut < 0:
+                # Premier morceau plus long qu'un fragment
+                piece_end = cuts.after(run)
+                self._split_segment(text, run, piece_end, level + 1, chunk_starts, chunk_ends)
+                run = piece_end
+                continue
+
+            self._emit(text, run, cut, chunk_starts, chunk_ends)
+            piece_end = cuts.after(cut)
+            if piece_end - cut >= self.chunk_size:
+                # Morceau suivant trop long : découpé à part, sans chevauchement
+                self._split_segment(text, cut, piece_end, level + 1, chunk_starts, chunk_ends)
+                run = piece_end
+            else:
+                # Chevauchement : derniers morceaux du fragment tenant dans
+                # chunk_overlap et laissant la place au morceau suivant
+                run = cuts.first(max(cut - self.chunk_overlap, piece_end - self.chunk_size))
+
+    def boundaries(self, text: str) -> Tuple[array, array]:
+        """
+        Calcule les positions (début, fin) des fragments du texte
+
+        Returns:
+            Deux tableaux compacts de positions de début et de fin
+        """
+        chunk_starts, chunk_ends = array("q"), array("q")
+        self._split_segment(text, 0, len(text), 0, chunk_starts, chunk_ends)
+        return chunk_starts, chunk_ends
+
+    def split_text(self, text: str) -> List[str]:
+        """Découpe un texte en fragments (matérialise toutes les sous-chaînes)"""
+        starts, ends = self.boundaries(text)
+        return [text[start:end] for start, end in zip(starts, ends)]
+
+    def chunk_documents(self, documents: Sequence[Document]) -> "ChunkedCorpus":
+        """Découpe des documents en un corpus compact de positions"""
+        corpus = ChunkedCorpus()
+        for document in documents:
+            starts, ends = self.boundaries(document.page_content)
+            corpus.add_page(document.page_content, document.metadata, starts, ends)
+        return corpus
+
+
+class ChunkedCorpus:
+    """
+    Fragments stockés sous forme de tableaux (page, début, fin).
+
+    Le texte et les métadonnées de chaque page sont partagés par tous ses
+    fragments; le texte d'un fragment n'est créé qu'à la demande.
+    """
+
+    __slots__ = ("texts", "metadatas", "pages", "starts", "ends")
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.pages = array("l")
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def add_page(self, text: str, metadata: dict, starts: array, ends: array) -> None:
+        page = len(self.texts)
+        self.texts.append(text)
+        self.metadatas.append(metadata)
+        self.pages.extend([page] * len(starts))
+        self.starts.extend(starts)
+        self.ends.extend(ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, index: int) -> str:
+        return self.texts[self.pages[index]][self.starts[index]:self.ends[index]]
+
+    def iter_texts(self, indices: Optional[Sequence[int]] = None) -> Iterator[str]:
+        for index in range(len(self)) if indices is None else indices:
+            yield self.text(index)
+
+    def document(self, index: int) -> Document:
+        """Matérialise un fragment en Document (métadonnées copiées à ce moment seulement)"""
+        metadata = dict(self.metadatas[self.pages[index]])
+        metadata["start_index"] = self.starts[index]
+        return Document(page_content=self.text(index), metadata=metadata)
+
+
+class ChunkDocstore(Docstore, AddableMixin):
+    """
+    Docstore FAISS adossé à des ChunkedCorpus : les Documents ne sont
+    construits que pour les fragments retournés par une recherche.
+    Les identifiants sont de la forme "<corpus>:<fragment>".
+    """
+
+    def __init__(self):
+        self.corpora: List[ChunkedCorpus] = []
+        self._documents: Dict[str, Document] = {}
+
+    def add_corpus(self, corpus: ChunkedCorpus) -> List[str]:
+        """Enregistre un corpus et retourne les identifiants de ses fragments"""
+        corpus_id = len(self.corpora)
+        self.corpora.append(corpus)
+        return [f"{corpus_id}:{index}" for index in range(len(corpus))]
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self._documents:
+            return self._documents[search]
+        try:
+            corpus_id, index = map(int, search.split(":"))
+            return self.corpora[corpus_id].document(index)
+        except (ValueError, IndexError):
+            return f"ID {search} not found."
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Documents ajoutés hors corpus (ex: FAISS.add_documents)"""
+        overlapping = set(texts).intersection(self._documents)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._documents.update(texts)
+
+    def delete(self, ids: List) -> None:
+        for _id in ids:
+            self._documents.pop(_id, None)
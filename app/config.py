@@ -16,22 +16,74 @@ class Config:
     OLLAMA_MODEL_TEMPERATURE: float = float(os.getenv("OLLAMA_MODEL_TEMPERATURE"))
     OLLAMA_MODEL_MAX_TOKENS: int = int(os.getenv("OLLAMA_MODEL_MAX_TOKENS"))
     OLLAMA_MODEL_TOP_P: float = float(os.getenv("OLLAMA_MODEL_TOP_P"))
+    # Durée de maintien du modèle en mémoire (et de son cache KV) entre deux appels
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+    # Cache de génération (températures nulles uniquement, 0 = désactivé)
+    GENERATION_CACHE_SIZE: int = int(os.getenv("GENERATION_CACHE_SIZE", "256"))
+    GENERATION_CACHE_TTL: float = float(os.getenv("GENERATION_CACHE_TTL", "3600"))
+    # Réutilise le contexte Ollama du préfixe fixe de synthèse
+    SUMMARY_PREFIX_CONTEXT: bool = os.getenv("SUMMARY_PREFIX_CONTEXT", "false").lower() == "true"
     
     # FAISS
     FAISS_TYPE: Literal["cpu", "gpu"] = os.getenv("FAISS_TYPE", "cpu")
     FAISS_INDEX_PATH: str = os.getenv("FAISS_INDEX_PATH")
+    # Interroge l'index persistant (ingest.py) avant toute recherche web
+    FAISS_USE_LOCAL_INDEX: bool = os.getenv("FAISS_USE_LOCAL_INDEX", "true").lower() == "true"
+
+    # Ingestion hors ligne
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "32"))
+    INGEST_CONCURRENCY: int = int(os.getenv("INGEST_CONCURRENCY", "4"))
+    INGEST_CHECKPOINT_EVERY: int = int(os.getenv("INGEST_CHECKPOINT_EVERY", "20"))
     
     # RAG
     RAG_CHUNK_SIZE: int = int(os.getenv("RAG_CHUNK_SIZE"))
     RAG_CHUNK_OVERLAP: int = int(os.getenv("RAG_CHUNK_OVERLAP"))
     RAG_RESULTS: int = int(os.getenv("RAG_RESULTS"))
+    RAG_CHUNKER: Literal["offset", "recursive"] = os.getenv("RAG_CHUNKER", "recursive")
+    RAG_PROJECTION: Literal["none", "pca", "truncate"] = os.getenv("RAG_PROJECTION", "none")
+    RAG_PROJECTION_DIM: int = int(os.getenv("RAG_PROJECTION_DIM", "256"))
+    RAG_PROJECTION_SAMPLE: int = int(os.getenv("RAG_PROJECTION_SAMPLE", "2000"))
     # RAG_TEMPERATURE: float = float(os.getenv("RAG_TEMPERATURE"))
+
+    # Contexte de session (questions de suivi)
+    SESSION_TTL: float = float(os.getenv("SESSION_TTL", "900"))
+    SESSION_MAX_MEMORY_MB: int = int(os.getenv("SESSION_MAX_MEMORY_MB", "256"))
+    SESSION_MAX_SESSION_MB: int = int(os.getenv("SESSION_MAX_SESSION_MB", "64"))
+    SESSION_MIN_RELEVANCE: float = float(os.getenv("SESSION_MIN_RELEVANCE", "0.6"))
+    SESSION_MIN_HITS: int = int(os.getenv("SESSION_MIN_HITS", "2"))
+
+    # Analyse de texte
+    ANALYSIS_CHUNK_SIZE: int = int(os.getenv("ANALYSIS_CHUNK_SIZE", "65536"))
+    ANALYSIS_TOP_N: int = int(os.getenv("ANALYSIS_TOP_N", "10"))
+    ANALYSIS_TOPICS: bool = os.getenv("ANALYSIS_TOPICS", "false").lower() == "true"
+    ANALYSIS_TOPICS_K: int = int(os.getenv("ANALYSIS_TOPICS_K", "5"))
+    ANALYSIS_TOPICS_MAX_CHUNKS: int = int(os.getenv("ANALYSIS_TOPICS_MAX_CHUNKS", "200"))
     
     # Recherche
     SEARCH_PROVIDER: Literal["exa", "firecrawl"] = os.getenv("SEARCH_PROVIDER")
+    # Fournisseurs utilisés par ordre de priorité (par défaut : SEARCH_PROVIDER seul)
+    SEARCH_PROVIDERS: list = [
+        name.strip() for name in os.getenv("SEARCH_PROVIDERS", os.getenv("SEARCH_PROVIDER", "exa")).split(",")
+        if name.strip()
+    ]
+    SEARCH_MODE: Literal["single", "race", "fanout"] = os.getenv("SEARCH_MODE", "single")
+    SEARCH_PROVIDER_TIMEOUT: float = float(os.getenv("SEARCH_PROVIDER_TIMEOUT", os.getenv("SEARCH_TIMEOUT", "30")))
+    SEARCH_BREAKER_FAILURES: int = int(os.getenv("SEARCH_BREAKER_FAILURES", "3"))
+    SEARCH_BREAKER_RESET: float = float(os.getenv("SEARCH_BREAKER_RESET", "30"))
     SEARCH_TIMEOUT: int = int(os.getenv("SEARCH_TIMEOUT"))
     SEARCH_MAX_RESULTS: int = int(os.getenv("SEARCH_MAX_RESULTS"))
+    SEARCH_RESPONSE_FORMAT: Literal["markdown", "compact", "structured"] = os.getenv("SEARCH_RESPONSE_FORMAT", "markdown")
     SEARCH_AUTOPROMPT: bool = os.getenv("SEARCH_AUTOPROMPT").lower() == "true"
+    SEARCH_FETCH_TIMEOUT: float = float(os.getenv("SEARCH_FETCH_TIMEOUT", "15"))
+    SEARCH_FETCH_WORKERS: int = int(os.getenv("SEARCH_FETCH_WORKERS", "16"))
+    SEARCH_BUDGET_RATIO: float = float(os.getenv("SEARCH_BUDGET_RATIO", "0.6"))
+    SEARCH_HEDGE_ENABLED: bool = os.getenv("SEARCH_HEDGE_ENABLED", "true").lower() == "true"
+    SEARCH_HEDGE_PERCENTILE: float = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "0.9"))
+    SEARCH_HEDGE_DELAY: float = float(os.getenv("SEARCH_HEDGE_DELAY", "2.0"))
+
+    # Échéance de bout en bout des requêtes (secondes, 0 = illimitée)
+    REQUEST_DEADLINE: float = float(os.getenv("REQUEST_DEADLINE", "45"))
     
     # API Keys
     SEARCH_API_KEY: Optional[str] = os.getenv("SEARCH_API_KEY")
@@ -50,6 +102,15 @@ class Config:
     SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS"))
     SERVER_LOG_LEVEL: str = os.getenv("SERVER_LOG_LEVEL")
     
+    # Profilage des requêtes
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0"))
+    PROFILING_SLOW_THRESHOLD: float = float(os.getenv("PROFILING_SLOW_THRESHOLD", "20"))
+    PROFILING_MAX_PROFILES: int = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+    PROFILING_TOP_FUNCTIONS: int = int(os.getenv("PROFILING_TOP_FUNCTIONS", "60"))
+    PROFILING_DIR: Optional[str] = os.getenv("PROFILING_DIR") or None
+    PROFILING_ADMIN_TOKEN: Optional[str] = os.getenv("PROFILING_ADMIN_TOKEN") or None
+    
     # Logging
     LOGGING_DIR: str = os.getenv("LOGGING_DIR")
     LOGGING_MAX_SIZE: int = int(os.getenv("LOGGING_MAX_SIZE", "10").strip().split()[0])
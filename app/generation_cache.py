@@ -0,0 +1,107 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def is_deterministic(options: Dict[str, Any]) -> bool:
+    """Une génération n'est reproductible qu'à température nulle"""
+    temperature = options.get("temperature")
+    return temperature is not None and temperature <= 0
+
+
+class GenerationCache:
+    """
+    Cache LRU avec expiration des réponses générées, indexé sur
+    (modèle, options, prompt). À réserver aux générations déterministes.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, options: Dict[str, Any], prompt: str) -> str:
+        payload = json.dumps([model, options, prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value: str) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class PrefixContext:
+    """
+    Contexte Ollama (jetons) d'un préfixe de prompt fixe.
+
+    Le préfixe est évalué une seule fois; les appels suivants transmettent
+    le `context` retourné par Ollama et seul le texte variable est envoyé.
+    Combiné au keep-alive, le runner Ollama retrouve ces jetons dans son
+    cache KV et n'a plus à recalculer le préfixe. Les durées de prefill
+    mesurées (prompt_eval_duration) servent à estimer le temps économisé.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.tokens: Optional[List[int]] = None
+        self.prefix_prefill_ms = 0.0
+        self.reuses = 0
+        self.calls = 0
+        self.prefill_ms_total = 0.0
+        self.prompt_tokens_total = 0
+
+    def prime(self, response: Any) -> None:
+        """Enregistre le contexte retourné par l'évaluation du préfixe"""
+        self.tokens = list(response.get("context") or []) or None
+        self.prefix_prefill_ms = (response.get("prompt_eval_duration") or 0) / 1e6
+
+    def record(self, response: Any, reused: bool) -> None:
+        """Comptabilise le prefill d'un appel"""
+        self.calls += 1
+        self.reuses += int(reused)
+        self.prefill_ms_total += (response.get("prompt_eval_duration") or 0) / 1e6
+        self.prompt_tokens_total += response.get("prompt_eval_count") or 0
+
+    def invalidate(self) -> None:
+        """Oublie le contexte après un échec de génération : le préfixe sera réévalué"""
+        self.tokens = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prefix_reuses": self.reuses,
+            "reuse_rate": round(self.reuses / self.calls, 3) if self.calls else 0.0,
+            "prefix_prefill_ms": round(self.prefix_prefill_ms, 1),
+            "prefill_ms_saved": round(self.reuses * self.prefix_prefill_ms, 1),
+            "prefill_ms_avg": round(self.prefill_ms_total / self.calls, 1) if self.calls else 0.0,
+            "prompt_tokens_avg": round(self.prompt_tokens_total / self.calls, 1) if self.calls else 0.0
+        }
@@ -0,0 +1,358 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from config import config
+from projection import EmbeddingProjection, ProjectedEmbeddings, create_projection
+from rag import RAGProcessor
+from search import clean_html
+from utils.logging_service import LoggingService
+
+# Extensions prises en charge et type de nettoyage associé
+INGEST_EXTENSIONS = {
+    ".html": "html",
+    ".htm": "html",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".txt": "text"
+}
+
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+
+
+def clean_markdown(text: str) -> str:
+    """Retire la syntaxe Markdown en conservant le texte"""
+    text = re.sub(r'```[^\n]*\n', '', text)  # Délimiteurs de blocs de code
+    text = re.sub(r'!\[([^\]]*)\]\([^)]*\)', r'\1', text)  # Images
+    text = re.sub(r'\[([^\]]+)\]\([^)]*\)', r'\1', text)  # Liens
+    text = re.sub(r'<[^>]+>', ' ', text)  # HTML embarqué
+    text = re.sub(r'^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s+', '', text, flags=re.MULTILINE)  # Titres, citations, listes
+    text = re.sub(r'[*_`~]{1,3}', '', text)  # Emphase
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def clean_file(path: Path) -> str:
+    """Lit et nettoie un fichier selon son type"""
+    raw = path.read_text(encoding="utf-8", errors="replace")
+    kind = INGEST_EXTENSIONS[path.suffix.lower()]
+    if kind == "html":
+        return clean_html(raw)
+    if kind == "markdown":
+        return clean_markdown(raw)
+    return re.sub(r'\s+', ' ', raw).strip()
+
+
+def iter_files(roots: List[str]) -> Iterator[Path]:
+    """Parcourt les répertoires (ou fichiers) en ordre déterministe"""
+    for root in roots:
+        root_path = Path(root)
+        if root_path.is_file():
+            if root_path.suffix.lower() in INGEST_EXTENSIONS:
+                yield root_path
+            continue
+        for dirpath, dirnames, filenames in os.walk(root_path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = Path(dirpath) / filename
+                if path.suffix.lower() in INGEST_EXTENSIONS:
+                    yield path
+
+
+class IngestionCheckpoint:
+    """
+    Liste des fichiers entièrement indexés et sauvegardés, avec leur
+    signature (taille, date de modification) pour la reprise
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, str] = {}
+        if path.exists():
+            self.done = json.loads(path.read_text(encoding="utf-8")).get("done", {})
+
+    @staticmethod
+    def signature(file_path: Path) -> str:
+        stat = file_path.stat()
+        return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+    def is_done(self, file_path: Path) -> bool:
+        return self.done.get(str(file_path)) == self.signature(file_path)
+
+    def mark(self, file_path: Path) -> None:
+        self.done[str(file_path)] = self.signature(file_path)
+
+    def save(self) -> None:
+        """Écriture atomique du point de reprise"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"done": self.done}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class Ingestor:
+    """
+    Ingestion hors ligne de fichiers locaux dans l'index FAISS persistant.
+
+    Les fichiers sont lus un par un, nettoyés et découpés par le splitter
+    de RAGProcessor, puis les fragments sont embarqués par lots concurrents.
+    La file bornée entre lecture et embedding limite la mémoire utilisée.
+    L'index et le point de reprise sont sauvegardés ensemble toutes les
+    `checkpoint_every` lots : une ingestion interrompue reprend sans
+    réindexer les fichiers terminés ni dupliquer de fragments.
+
+    Un nouvel index est construit avec la projection RAG_PROJECTION; pour
+    l'ACP, les premiers lots sont conservés jusqu'à RAG_PROJECTION_SAMPLE
+    vecteurs, la projection est ajustée puis enregistrée avec l'index.
+    Un index existant conserve l'espace (projeté ou non) de sa création.
+    """
+
+    def __init__(self, index_path: str, batch_size: int, concurrency: int, checkpoint_every: int):
+        self.index_path = index_path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.rag = RAGProcessor()
+        self.checkpoint = IngestionCheckpoint(Path(index_path) / CHECKPOINT_FILE)
+        self.logger = LoggingService().get_logger(self.__class__.__name__)
+
+        self.vectorstore: Optional[FAISS] = None
+        # Fonction d'embedding de l'index (None tant que l'ACP n'est pas ajustée)
+        self.embeddings: Optional[Embeddings] = None
+        self._unprojected: List[Tuple[list, np.ndarray]] = []
+        self._projection: Optional[EmbeddingProjection] = None
+        # Identifiants déjà indexés par fichier ("<chemin>@<signature>#<n>")
+        self.existing_ids: Dict[str, set] = {}
+        self._index_lock = asyncio.Lock()
+        # Fragments restant à indexer par fichier (fichier terminé à 0)
+        self._pending_chunks: Dict[Path, int] = {}
+        self._completed: List[Path] = []
+        self._batches_since_save = 0
+
+        self.stats = {"files": 0, "skipped": 0, "chunks": 0, "bytes": 0}
+        self._started = 0.0
+
+    async def run(self, roots: List[str]) -> dict:
+        """Ingère les fichiers des répertoires donnés et retourne les statistiques"""
+        self._started = time.monotonic()
+        self.vectorstore = self.rag.load_index(self.index_path)
+        if self.vectorstore is not None:
+            self.embeddings = self.vectorstore.embedding_function
+            for chunk_id in self.vectorstore.index_to_docstore_id.values():
+                path = chunk_id.rsplit("@", 1)[0]
+                self.existing_ids.setdefault(path, set()).add(chunk_id)
+        else:
+            projection = create_projection(config.RAG_PROJECTION, config.RAG_PROJECTION_DIM)
+            if projection is None:
+                self.embeddings = self.rag.base_embeddings
+            elif projection.fitted:
+                self.embeddings = ProjectedEmbeddings(self.rag.base_embeddings, projection)
+            else:
+                self._projection = projection
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        tasks = [asyncio.create_task(self._produce(roots, queue))]
+        tasks += [asyncio.create_task(self._embed_worker(queue)) for _ in range(self.concurrency)]
+        try:
+            # Une erreur d'embedding interrompt aussi la lecture des fichiers
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if self.embeddings is None and self._unprojected:
+            # Corpus plus petit que l'échantillon : ajustement sur les vecteurs disponibles
+            async with self._index_lock:
+                await self._fit_projection()
+        await self._save()
+        self._report(final=True)
+        return self.stats
+
+    async def _produce(self, roots: List[str], queue: asyncio.Queue) -> None:
+        """Lit, nettoie et découpe les fichiers, puis alimente la file par lots"""
+        batch: List[Tuple[Path, str, str]] = []
+        for path in iter_files(roots):
+            if self.checkpoint.is_done(path):
+                self.stats["skipped"] += 1
+                continue
+            try:
+                text = await asyncio.to_thread(clean_file, path)
+            except OSError as error:
+                self.logger.warning("Lecture impossible", extra={"path": str(path), "error": str(error)})
+                continue
+
+            # Les fragments d'une version antérieure du fichier sont retirés,
+            # ceux de la version courante déjà indexés (reprise) sont ignorés
+            prefix = f"{path}@{self.checkpoint.signature(path)}#"
+            indexed = self.existing_ids.pop(str(path), set())
+            stale = [chunk_id for chunk_id in indexed if not chunk_id.startswith(prefix)]
+            if stale:
+                async with self._index_lock:
+                    self.vectorstore.delete(stale)
+
+            chunks = [
+                (f"{prefix}{index}", chunk)
+                for index, chunk in enumerate(self.rag.split_text(text))
+                if f"{prefix}{index}" not in indexed
+            ]
+            self.stats["bytes"] += len(text.encode("utf-8"))
+            if not chunks:
+                self._completed.append(path)
+                continue
+
+            self._pending_chunks[path] = len(chunks)
+            for chunk_id, chunk in chunks:
+                batch.append((path, chunk_id, chunk))
+                if len(batch) >= self.batch_size:
+                    await queue.put(batch)
+                    batch = []
+        if batch:
+            await queue.put(batch)
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    async def _embed_worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            texts = [chunk for _, _, chunk in batch]
+            vectors = await self.rag.base_embeddings.aembed_documents(texts)
+            await self._add_batch(batch, np.asarray(vectors, dtype=np.float32))
+
+    async def _add_batch(self, batch: List[Tuple[Path, str, str]], vectors: np.ndarray) -> None:
+        """Ajoute un lot embarqué (vecteurs bruts) à l'index et sauvegarde périodiquement"""
+        async with self._index_lock:
+            if self.embeddings is None:
+                # ACP en attente de son échantillon d'ajustement
+                self._unprojected.append((batch, vectors))
+                if sum(len(pending) for pending, _ in self._unprojected) < config.RAG_PROJECTION_SAMPLE:
+                    return
+                await self._fit_projection()
+                return
+            await self._index_batch(batch, vectors)
+
+    async def _fit_projection(self) -> None:
+        """Ajuste l'ACP sur les lots en attente, puis les indexe"""
+        sample = np.vstack([vectors for _, vectors in self._unprojected])
+        if len(sample) >= self._projection.dimension:
+            await asyncio.to_thread(self._projection.fit, sample)
+            self.embeddings = ProjectedEmbeddings(self.rag.base_embeddings, self._projection)
+            self.logger.info(
+                "Projection ajustée",
+                extra={"dimension": self._projection.dimension, "sample_size": len(sample)}
+            )
+        else:
+            self.embeddings = self.rag.base_embeddings
+            self.logger.warning(
+                "Échantillon insuffisant pour l'ACP, index construit sans projection",
+                extra={"sample_size": len(sample), "dimension": self._projection.dimension}
+            )
+        pending, self._unprojected = self._unprojected, []
+        for batch, vectors in pending:
+            await self._index_batch(batch, vectors)
+
+    async def _index_batch(self, batch: List[Tuple[Path, str, str]], vectors: np.ndarray) -> None:
+        """Projette et indexe un lot (appelé sous le verrou de l'index)"""
+        if isinstance(self.embeddings, ProjectedEmbeddings):
+            vectors = self.embeddings.projection.transform(vectors)
+        text_embeddings = [(chunk, vector) for (_, _, chunk), vector in zip(batch, vectors.tolist())]
+        metadatas = [{"source": str(path), "title": path.stem} for path, _, _ in batch]
+        ids = [chunk_id for _, chunk_id, _ in batch]
+
+        if self.vectorstore is None:
+            self.vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+        else:
+            self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+        for path, _, _ in batch:
+            self._pending_chunks[path] -= 1
+            if self._pending_chunks[path] == 0:
+                del self._pending_chunks[path]
+                self._completed.append(path)
+        self.stats["chunks"] += len(batch)
+
+        self._batches_since_save += 1
+        if self._batches_since_save >= self.checkpoint_every:
+            await self._save()
+        self._report()
+
+    async def _save(self) -> None:
+        """Sauvegarde l'index puis marque les fichiers terminés dans le point de reprise"""
+        if self.vectorstore is not None:
+            await asyncio.to_thread(self.rag.save_index, self.vectorstore, self.index_path)
+        for path in self._completed:
+            self.checkpoint.mark(path)
+        self.stats["files"] += len(self._completed)
+        self._completed = []
+        self.checkpoint.save()
+        self._batches_since_save = 0
+
+    def _report(self, final: bool = False) -> None:
+        """Affiche la progression et le débit"""
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        progress = {
+            **self.stats,
+            "elapsed": round(elapsed, 1),
+            "chunks_per_s": round(self.stats["chunks"] / elapsed, 1),
+            "mb_per_s": round(self.stats["bytes"] / elapsed / (1024 * 1024), 3)
+        }
+        self.logger.info("Ingestion terminée" if final else "Progression de l'ingestion", extra=progress)
+        print(
+            f"{'Terminé' if final else 'En cours'} : {progress['files']} fichiers sauvegardés, "
+            f"{progress['skipped']} ignorés, {progress['chunks']} fragments "
+            f"({progress['chunks_per_s']} fragments/s, {progress['mb_per_s']} Mo/s)"
+        )
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Indexe des fichiers locaux (HTML, Markdown, texte) dans l'index FAISS persistant"
+    )
+    parser.add_argument("paths", nargs="+", help="Répertoires ou fichiers à ingérer")
+    parser.add_argument("--index", default=config.FAISS_INDEX_PATH, help="Répertoire de l'index FAISS")
+    parser.add_argument("--batch-size", type=int, default=config.INGEST_BATCH_SIZE, help="Fragments par appel d'embedding")
+    parser.add_argument("--concurrency", type=int, default=config.INGEST_CONCURRENCY, help="Appels d'embedding simultanés")
+    parser.add_argument("--checkpoint-every", type=int, default=config.INGEST_CHECKPOINT_EVERY, help="Lots entre deux sauvegardes")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Revérifie tous les fichiers (les fragments déjà indexés restent dédupliqués)"
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Point d'entrée de l'ingestion hors ligne"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        ingestor = Ingestor(
+            index_path=args.index,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            checkpoint_every=args.checkpoint_every
+        )
+        if args.restart:
+            ingestor.checkpoint.done = {}
+        await ingestor.run(args.paths)
+
+    except Exception as error:
+        LoggingService().log_structured(
+            level=logging.CRITICAL,
+            message="Erreur critique pendant l'ingestion",
+            module="Ingest",
+            metadata={"error": str(error)}
+        )
+        raise
+
+if __name__ == "__main__":
+    asyncio.run(main())
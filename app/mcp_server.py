@@ -1,10 +1,15 @@
 import asyncio
+import hmac
 import logging
-from fastapi import FastAPI
-from fastmcp import FastMCP
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import Response
+from typing import Optional, Union
+from fastmcp import FastMCP, Context
+from agent import RESPONSE_FORMATS, StructuredResponse
 from agent_orchestrator import AgentOrchestrator
 from config import config
 from utils.logging_service import LoggingService
+from utils.deadline import Deadline
 import uvicorn
 
 class MCPServer:
@@ -25,28 +30,59 @@ class MCPServer:
         )
         
         self._setup_routes()
+        if config.PROFILING_ENABLED:
+            if config.PROFILING_ADMIN_TOKEN:
+                self._setup_profiling_routes()
+            else:
+                self.logger.warning(
+                    "Profils non exposés : PROFILING_ADMIN_TOKEN non configuré",
+                    extra={"profiling_dir": config.PROFILING_DIR}
+                )
         self._log_startup()
 
     def _setup_routes(self) -> None:
         """Configure les endpoints de l'API"""
         
         @self.mcp.tool()
-        async def search(query: str) -> str:
-            """Endpoint de recherche"""
+        async def search(query: str, ctx: Context, response_format: Optional[str] = None) -> Union[str, dict]:
+            """
+            Endpoint de recherche (les questions de suivi réutilisent le contexte de la session).
+            response_format: markdown (défaut), compact (sans extraits des sources)
+            ou structured (synthesis, sources [{title, url, excerpt}], urls, error)
+            """
+            response_format = response_format or config.SEARCH_RESPONSE_FORMAT
+            if response_format not in RESPONSE_FORMATS:
+                return StructuredResponse(
+                    synthesis="",
+                    sources=[],
+                    urls=[],
+                    error=f"Format de réponse non supporté: {response_format} ({', '.join(RESPONSE_FORMATS)})"
+                )
+            deadline = Deadline(config.REQUEST_DEADLINE)
             self._log_request("search", query)
-            return await self.orchestrator.process_query(query, "search")
+            return await self.orchestrator.process_query(
+                query,
+                "search",
+                deadline=deadline,
+                session_id=self._session_id(ctx),
+                response_format=response_format
+            )
               
         @self.mcp.tool()
-        async def analyze(text: str) -> str:
-            """Endpoint d'analyse de texte"""
+        async def analyze(text: str, topics: Optional[bool] = None) -> str:
+            """Endpoint d'analyse de texte (topics: regroupement thématique par embeddings)"""
+            deadline = Deadline(config.REQUEST_DEADLINE)
             self._log_request("analyze", text)
-            return await self.orchestrator.process_query(text, "analyze")
+            return await self.orchestrator.process_query(
+                text, "analyze", deadline=deadline, topics=topics
+            )
               
         @self.mcp.tool()
         async def generate(prompt: str) -> str:
             """Endpoint de génération de contenu"""
+            deadline = Deadline(config.REQUEST_DEADLINE)
             self._log_request("generate", prompt)
-            return await self.orchestrator.process_query(prompt, "generate")
+            return await self.orchestrator.process_query(prompt, "generate", deadline=deadline)
 
         @self.mcp.tool()
         async def health() -> dict:
@@ -54,9 +90,82 @@ class MCPServer:
             return {
                 "status": "ok",
                 "version": config.SERVER_VERSION,
-                "service": config.SERVER_NAME
+                "service": config.SERVER_NAME,
+                "agents": self.orchestrator.get_stats()
             }
 
+    @staticmethod
+    def _valid_admin_token(token: Optional[str]) -> bool:
+        """Vérifie le jeton d'administration (refusé si aucun jeton n'est configuré)"""
+        expected = config.PROFILING_ADMIN_TOKEN
+        return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+    def _setup_profiling_routes(self) -> None:
+        """
+        Outils MCP et routes HTTP d'administration des profils capturés.
+        Les profils contiennent des extraits de requêtes et les piles de
+        toutes les tâches : chaque accès exige PROFILING_ADMIN_TOKEN.
+        """
+        profiler = self.orchestrator.profiler
+
+        @self.mcp.tool()
+        async def list_profiles(admin_token: str) -> list:
+            """Liste les profils de requêtes capturés (échantillonnés ou lents)"""
+            if not self._valid_admin_token(admin_token):
+                return [{"error": "Jeton d'administration invalide"}]
+            return profiler.list_profiles()
+
+        @self.mcp.tool()
+        async def get_profile(profile_id: str, admin_token: str) -> dict:
+            """Détail d'un profil : étapes chronométrées, piles asyncio, arbre d'appels"""
+            if not self._valid_admin_token(admin_token):
+                return {"error": "Jeton d'administration invalide"}
+            profile = profiler.get_profile(profile_id)
+            if profile is None:
+                return {"error": f"Profil introuvable: {profile_id}"}
+            return profile.to_dict()
+
+        def check_token(token):
+            if not self._valid_admin_token(token):
+                raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+        @self.app.get("/admin/profiles")
+        async def http_list_profiles(x_admin_token: str = Header(None)):
+            check_token(x_admin_token)
+            return profiler.list_profiles()
+
+        @self.app.get("/admin/profiles/{profile_id}")
+        async def http_get_profile(profile_id: str, x_admin_token: str = Header(None)):
+            check_token(x_admin_token)
+            profile = profiler.get_profile(profile_id)
+            if profile is None:
+                raise HTTPException(status_code=404, detail="Profil introuvable")
+            return profile.to_dict()
+
+        @self.app.get("/admin/profiles/{profile_id}/pstats")
+        async def http_download_pstats(profile_id: str, x_admin_token: str = Header(None)):
+            """Télécharge le profil cProfile (lisible par pstats ou snakeviz)"""
+            check_token(x_admin_token)
+            profile = profiler.get_profile(profile_id)
+            if profile is None or profile.pstats_data is None:
+                raise HTTPException(status_code=404, detail="Profil cProfile introuvable")
+            return Response(
+                content=profile.pstats_data,
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+            )
+
+    @staticmethod
+    def _session_id(ctx: Optional[Context]) -> Optional[str]:
+        """Identifiant de session MCP (ou, à défaut, du client) de la requête"""
+        if ctx is None:
+            return None
+        try:
+            session_id = ctx.session_id
+        except Exception:
+            session_id = None
+        return session_id or getattr(ctx, "client_id", None)
+
     def _log_request(self, endpoint: str, data: str) -> None:
         """Journalise les requêtes entrantes"""
         LoggingService().log_structured(
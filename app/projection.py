@@ -0,0 +1,154 @@
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+PROJECTION_FILE = "projection.npz"
+
+
+class EmbeddingProjection(ABC):
+    """
+    Réduction de dimension appliquée aux embeddings, à l'identique pour les
+    documents et les requêtes
+    """
+
+    kind: str = ""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    @property
+    @abstractmethod
+    def fitted(self) -> bool:
+        pass
+
+    def fit(self, vectors: np.ndarray) -> None:
+        """Ajuste la projection sur un échantillon de vecteurs"""
+
+    @abstractmethod
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        pass
+
+    def _arrays(self) -> dict:
+        return {}
+
+    def save(self, directory: str) -> None:
+        """Sauvegarde la projection à côté de l'index"""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({"kind": self.kind, "dimension": self.dimension})
+        np.savez(path / PROJECTION_FILE, meta=np.array(meta), **self._arrays())
+
+
+class TruncationProjection(EmbeddingProjection):
+    """
+    Troncature aux premières composantes puis renormalisation, pour les
+    modèles entraînés en Matryoshka (ex: nomic-embed-text, mxbai-embed-large)
+    """
+
+    kind = "truncate"
+
+    @property
+    def fitted(self) -> bool:
+        return True
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        reduced = np.ascontiguousarray(vectors[:, :self.dimension], dtype=np.float32)
+        reduced /= np.linalg.norm(reduced, axis=1, keepdims=True) + 1e-12
+        return reduced
+
+
+class PCAProjection(EmbeddingProjection):
+    """
+    Analyse en composantes principales ajustée sur un échantillon du corpus.
+    Les vecteurs projetés sont renormalisés : les scores de pertinence FAISS
+    (1 - d/√2) supposent des vecteurs unitaires.
+    """
+
+    kind = "pca"
+
+    def __init__(self, dimension: int, mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None):
+        super().__init__(dimension)
+        self.mean = mean
+        self.components = components
+
+    @property
+    def fitted(self) -> bool:
+        return self.components is not None
+
+    def fit(self, vectors: np.ndarray) -> None:
+        if len(vectors) < self.dimension:
+            raise ValueError(
+                f"Échantillon insuffisant pour une ACP en {self.dimension} dimensions ({len(vectors)} vecteurs)"
+            )
+        data = np.asarray(vectors, dtype=np.float64)
+        self.mean = data.mean(axis=0)
+        _, _, vt = np.linalg.svd(data - self.mean, full_matrices=False)
+        self.components = vt[:self.dimension].astype(np.float32)
+        self.mean = self.mean.astype(np.float32)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        if not self.fitted:
+            raise RuntimeError("Projection ACP non ajustée")
+        centered = np.asarray(vectors, dtype=np.float32) - self.mean
+        reduced = np.ascontiguousarray(centered @ self.components.T)
+        reduced /= np.linalg.norm(reduced, axis=1, keepdims=True) + 1e-12
+        return reduced
+
+    def _arrays(self) -> dict:
+        return {"mean": self.mean, "components": self.components}
+
+
+PROJECTION_REGISTRY = {
+    "truncate": TruncationProjection,
+    "pca": PCAProjection
+}
+
+
+def create_projection(kind: str, dimension: int) -> Optional[EmbeddingProjection]:
+    """Crée une projection non ajustée ("none" = pas de projection)"""
+    if kind == "none":
+        return None
+    if kind not in PROJECTION_REGISTRY:
+        raise ValueError(f"Projection non supportée: {kind}")
+    return PROJECTION_REGISTRY[kind](dimension)
+
+
+def load_projection(directory: str) -> Optional[EmbeddingProjection]:
+    """Charge la projection sauvegardée avec un index, s'il y en a une"""
+    path = Path(directory) / PROJECTION_FILE
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        projection = create_projection(meta["kind"], meta["dimension"])
+        if isinstance(projection, PCAProjection):
+            projection.mean = data["mean"]
+            projection.components = data["components"]
+    return projection
+
+
+class ProjectedEmbeddings(Embeddings):
+    """Embeddings Ollama suivis de la projection, pour l'indexation comme pour les requêtes"""
+
+    def __init__(self, base: Embeddings, projection: EmbeddingProjection):
+        self.base = base
+        self.projection = projection
+
+    def _project(self, vectors: List[List[float]]) -> List[List[float]]:
+        return self.projection.transform(np.asarray(vectors, dtype=np.float32)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._project(self.base.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._project([self.base.embed_query(text)])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._project(await self.base.aembed_documents(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._project([await self.base.aembed_query(text)])[0]
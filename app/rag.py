@@ -1,7 +1,13 @@
+import os  
+from typing import Optional  
+import numpy as np  
 from langchain_ollama import OllamaEmbeddings  
 from langchain.text_splitter import RecursiveCharacterTextSplitter  
 from langchain_community.vectorstores import FAISS  
 from langchain_core.documents import Document  
+from langchain_core.embeddings import Embeddings  
+from chunking import ChunkDocstore, ChunkedCorpus, OffsetChunker  
+from projection import EmbeddingProjection, ProjectedEmbeddings, create_projection, load_projection  
 from config import config  
 from utils.logging_service import LoggingService
 
@@ -9,17 +15,84 @@ class RAGProcessor:
     """  
     Processeur RAG (Retrieval-Augmented Generation) qui gère les embeddings,  
     le découpage de texte et la recherche vectorielle.  
+    
+    Une projection optionnelle (RAG_PROJECTION : ACP ou troncature) réduit
+    la dimension des vecteurs. Chaque index garde la fonction d'embedding
+    avec laquelle il a été construit, les requêtes sont donc projetées comme
+    ses documents. L'ACP n'est jamais ajustée ici : elle est reprise de
+    l'index persistant (ajustée hors ligne par ingest.py); sans elle, les
+    vecteurs ne sont pas projetés.
+    
+    Les embeddings et les paramètres de découpage peuvent être fournis
+    explicitement (ex: benchmarks/rag_tuner.py), sinon ils viennent de la
+    configuration. `use_projection=False` ignore RAG_PROJECTION (embeddings
+    fournis, de dimension différente de celle de l'index persistant).
     """  
-    def __init__(self):  
+    def __init__(self,  
+                 embeddings: Optional[Embeddings] = None,  
+                 chunk_size: Optional[int] = None,  
+                 chunk_overlap: Optional[int] = None,  
+                 use_projection: bool = True):  
         self.logger = LoggingService().get_logger(self.__class__.__name__)
-        self.embeddings = OllamaEmbeddings(  
+        self.base_embeddings = embeddings or OllamaEmbeddings(  
             model=config.EMBEDDING_MODEL,  
             base_url=config.OLLAMA_BASE_URL  
         )  
+        self.chunk_size = chunk_size or config.RAG_CHUNK_SIZE  
+        self.chunk_overlap = config.RAG_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap  
+        self.projection = self._configured_projection() if use_projection else None  
+        self._projected_embeddings: Optional[ProjectedEmbeddings] = None  
         self.text_splitter = RecursiveCharacterTextSplitter(  
-            chunk_size=config.RAG_CHUNK_SIZE,
-            chunk_overlap=config.RAG_CHUNK_OVERLAP  
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap  
         )  
+        # Découpage par positions (RAG_CHUNKER=offset) : fragments matérialisés à la demande  
+        self.chunker = OffsetChunker(  
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap  
+        ) if config.RAG_CHUNKER == "offset" else None  
+      
+    def _configured_projection(self) -> Optional[EmbeddingProjection]:  
+        """  
+        Projection RAG_PROJECTION utilisable sans ajustement : celle de
+        l'index persistant, ou une troncature. Une ACP absente du disque
+        n'est pas ajustée sur les requêtes (coût d'une SVD dans la boucle
+        asyncio, échantillon non représentatif).
+        """ 
+        if config.RAG_PROJECTION == "none":  
+            return None  
+        projection = load_projection(config.FAISS_INDEX_PATH)  
+        if projection is None:  
+            projection = create_projection(config.RAG_PROJECTION, config.RAG_PROJECTION_DIM)  
+        if not projection.fitted:  
+            self.logger.warning(
+                "Projection non ajustée : lancer ingest.py; embeddings non projetés en attendant",
+                extra={
+                    "kind": projection.kind,
+                    "path": config.FAISS_INDEX_PATH
+                }
+            )
+            return None  
+        return projection  
+      
+    @property  
+    def embeddings(self) -> Embeddings:  
+        """  
+        Fonction d'embedding des nouveaux index : projetée si une projection est disponible  
+        """ 
+        if self.projection is None:  
+            return self.base_embeddings  
+        if self._projected_embeddings is None:  
+            self._projected_embeddings = ProjectedEmbeddings(self.base_embeddings, self.projection)  
+        return self._projected_embeddings  
+      
+    def split_text(self, text: str) -> list[str]:  
+        """  
+        Découpe un texte en fragments avec le découpeur configuré  
+        """ 
+        if self.chunker is not None:  
+            return self.chunker.split_text(text)  
+        return self.text_splitter.split_text(text)  
       
     async def create_from_documents(self, documents: list[Document]) -> FAISS:  
         """  
@@ -29,22 +102,74 @@ class RAGProcessor:
             "Création du vectorstore",
             extra={
                 "doc_count": len(documents),
-                "chunk_size": config.RAG_CHUNK_SIZE,
-                "chunk_overlap": config.RAG_CHUNK_OVERLAP
+                "chunk_size": self.chunk_size,
+                "chunk_overlap": self.chunk_overlap
             }
         )
         
+        if self.chunker is not None:  
+            corpus = self.chunker.chunk_documents(documents)  
+            self._log_split(documents, len(corpus))  
+            if not len(corpus):  
+                raise ValueError("Aucun contenu à indexer")  
+            
+            embeddings = self.embeddings  
+            vectors = await self._embed_texts(list(corpus.iter_texts()), embeddings)  
+            vectorstore = FAISS(  
+                embedding_function=embeddings,  
+                index=self._new_index(vectors.shape[1]),  
+                docstore=ChunkDocstore(),  
+                index_to_docstore_id={}  
+            )  
+            self._append_corpus(vectorstore, corpus, vectors)  
+            return vectorstore  
+        
         split_docs = self.text_splitter.split_documents(documents)  
+        self._log_split(documents, len(split_docs))  
         
+        embeddings = self.embeddings  
+        texts = [doc.page_content for doc in split_docs]  
+        vectors = await self._embed_texts(texts, embeddings)  
+        return FAISS.from_embeddings(  
+            zip(texts, vectors.tolist()),  
+            embeddings,  
+            metadatas=[doc.metadata for doc in split_docs]  
+        )  
+      
+    def _log_split(self, documents: list[Document], split_count: int) -> None:  
         self.logger.info(
             "Documents découpés",
             extra={
                 "initial_docs": len(documents),
-                "split_docs": len(split_docs)
+                "split_docs": split_count
             }
         )
-         
-        return await FAISS.afrom_documents(split_docs, self.embeddings)  
+      
+    async def _embed_texts(self, texts: list[str], embeddings: Embeddings) -> np.ndarray:  
+        """  
+        Embarque des textes dans l'espace de `embeddings` (projeté ou non)  
+        """ 
+        vectors = np.asarray(await self.base_embeddings.aembed_documents(texts), dtype=np.float32)  
+        if isinstance(embeddings, ProjectedEmbeddings):  
+            return embeddings.projection.transform(vectors)  
+        return vectors  
+      
+    @staticmethod
+    def _new_index(dimension: int):  
+        import faiss  
+        return faiss.IndexFlatL2(dimension)  
+      
+    @staticmethod
+    def _append_corpus(vectorstore: FAISS, corpus: ChunkedCorpus, vectors: np.ndarray) -> None:  
+        """  
+        Ajoute les vecteurs d'un corpus à l'index, les Documents restant paresseux  
+        """ 
+        ids = vectorstore.docstore.add_corpus(corpus)  
+        offset = vectorstore.index.ntotal  
+        vectorstore.index.add(vectors)  
+        vectorstore.index_to_docstore_id.update(  
+            {offset + position: chunk_id for position, chunk_id in enumerate(ids)}  
+        )  
       
     async def similarity_search(self, query: str, vectorstore: FAISS, k: int = 3) -> list[Document]:  
         """  
@@ -69,4 +194,101 @@ class RAGProcessor:
         )
         
         return results
-    
\ No newline at end of file
+
+    async def add_documents(self, vectorstore: FAISS, documents: list[Document]) -> int:  
+        """  
+        Découpe et ajoute des documents à un vectorstore existant  
+        
+        Returns:
+            Nombre de fragments ajoutés
+        """ 
+        if self.chunker is not None and isinstance(vectorstore.docstore, ChunkDocstore):  
+            corpus = self.chunker.chunk_documents(documents)  
+            if len(corpus):  
+                vectors = await self._embed_texts(list(corpus.iter_texts()), vectorstore.embedding_function)  
+                self._append_corpus(vectorstore, corpus, vectors)  
+            split_count = len(corpus)  
+        else:  
+            split_docs = self.text_splitter.split_documents(documents)  
+            if split_docs:  
+                texts = [doc.page_content for doc in split_docs]  
+                vectors = await self._embed_texts(texts, vectorstore.embedding_function)  
+                vectorstore.add_embeddings(  
+                    zip(texts, vectors.tolist()),  
+                    metadatas=[doc.metadata for doc in split_docs]  
+                )  
+            split_count = len(split_docs)  
+        
+        self.logger.info(
+            "Documents ajoutés au vectorstore",
+            extra={
+                "initial_docs": len(documents),
+                "split_docs": split_count
+            }
+        )
+        
+        return split_count  
+      
+    async def similarity_search_with_relevance(self, query: str, vectorstore: FAISS, k: int = 3) -> list[tuple[Document, float]]:  
+        """  
+        Recherche de similarité avec score de pertinence normalisé (0-1)  
+        """ 
+        results = await vectorstore.asimilarity_search_with_relevance_scores(query, k=k)
+        
+        self.logger.info(
+            "Résultats de la recherche avec scores",
+            extra={
+                "query": query[:200],
+                "results_count": len(results),
+                "best_score": round(results[0][1], 3) if results else None
+            }
+        )
+        
+        return results
+
+    def load_index(self, path: str = config.FAISS_INDEX_PATH) -> Optional[FAISS]:  
+        """  
+        Charge l'index persistant (construit par l'ingestion hors ligne)  
+        
+        Returns:
+            Le vectorstore, ou None si aucun index n'existe à cet emplacement
+        """ 
+        if not os.path.exists(os.path.join(path, "index.faiss")):  
+            return None  
+        
+        # L'index est interrogé dans l'espace (projeté ou non) où il a été construit  
+        projection = load_projection(path)  
+        embeddings = ProjectedEmbeddings(self.base_embeddings, projection) if projection else self.base_embeddings  
+        vectorstore = FAISS.load_local(  
+            path,  
+            embeddings,  
+            allow_dangerous_deserialization=True  # Index produit localement par ingest.py  
+        )  
+        
+        self.logger.info(
+            "Index persistant chargé",
+            extra={
+                "path": path,
+                "vectors": vectorstore.index.ntotal,
+                "dimension": vectorstore.index.d,
+                "projection": projection.kind if projection else None
+            }
+        )
+        
+        return vectorstore  
+      
+    def save_index(self, vectorstore: FAISS, path: str = config.FAISS_INDEX_PATH) -> None:  
+        """  
+        Sauvegarde l'index sur disque, avec sa projection éventuelle  
+        """ 
+        vectorstore.save_local(path)  
+        if isinstance(vectorstore.embedding_function, ProjectedEmbeddings):  
+            vectorstore.embedding_function.projection.save(path)  
+        
+        self.logger.info(
+            "Index persistant sauvegardé",
+            extra={
+                "path": path,
+                "vectors": vectorstore.index.ntotal
+            }
+        )
@@ -1,51 +1,103 @@
 import asyncio  
-from exa_py import Exa  
-from typing import List, Tuple  
+import time  
+from concurrent.futures import ThreadPoolExecutor  
+from typing import List, Optional, Tuple  
 from langchain_core.documents import Document  
 from config import config  
 import requests  
 from bs4 import BeautifulSoup  
 import re  
 from utils.logging_service import LoggingService
+from utils.deadline import Deadline, LatencyTracker
+from utils.profiling import span
+from search_providers import SearchRouter, SearchResult
 
+def clean_html(html: str, max_length: Optional[int] = None) -> str:  
+    """Extrait et nettoie le contenu principal d'une page HTML"""  
+    soup = BeautifulSoup(html, 'html.parser')  
+      
+    # Suppression des éléments inutiles  
+    for element in soup(['script', 'style', 'nav', 'footer', 'iframe', 'aside', 'form']):  
+        element.decompose()  
+      
+    # Extraction prioritaire des balises article/main  
+    main_content = soup.find(['article', 'main']) or soup  
+      
+    # Nettoyage avancé  
+    text = ' '.join(main_content.stripped_strings)  
+    text = re.sub(r'\s+', ' ', text)  # Espaces multiples  
+    text = re.sub(r'\[[^\]]+\]', '', text)  # Notes [1]  
+    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '', text)  # Emails  
+      
+    return text[:max_length] if max_length else text  
+  
 class WebSearcher:  
     def __init__(self):  
-        self.exa = Exa(config.SEARCH_API_KEY)  
+        self.router = SearchRouter.from_config()  
         self.headers = {  
             'User-Agent': config.SEARCH_PROVIDER
         }  
         self.logger = LoggingService().get_logger(self.__class__.__name__)
+        # Latences de scraping observées, base du délai de relance (hedging)
+        self.fetch_latencies = LatencyTracker()
+        # Pool dédié : une requête HTTP abandonnée occupe son thread jusqu'à
+        # SEARCH_FETCH_TIMEOUT sans bloquer l'exécuteur par défaut (to_thread)
+        self.fetch_executor = ThreadPoolExecutor(
+            max_workers=config.SEARCH_FETCH_WORKERS,
+            thread_name_prefix="fetch"
+        )
+
+    async def execute(self, query: str, deadline: Optional[Deadline] = None) -> Tuple[str, List[Document]]:  
+        """
+        Recherche web puis scraping des pages trouvées
+
+        Args:
+            query: Requête de recherche
+            deadline: Échéance de l'étape; à expiration, seules les pages
+                déjà récupérées sont retournées
 
-    async def execute(self, query: str) -> Tuple[str, List[Document]]:  
+        Returns:
+            Résumé formaté des résultats et documents récupérés
+        """
+        deadline = deadline or Deadline.unbounded()
         try:  
             self.logger.info(
                 "Exécution de la recherche",
                 extra={"query": query}
             )
             
-            # Recherche avec Exa  
-            results = await asyncio.to_thread(  
-                self.exa.search_and_contents,  
-                query,  
-                num_results=config.SEARCH_MAX_RESULTS,  
-                use_autoprompt=config.SEARCH_AUTOPROMPT,  
-                text={"include_html_tags": False}  
-            )  
+            # Recherche auprès des fournisseurs configurés (SEARCH_MODE)  
+            with span("search_providers"):  
+                results = await asyncio.wait_for(  
+                    self.router.search(query, config.SEARCH_MAX_RESULTS, deadline),  
+                    timeout=deadline.timeout(config.SEARCH_TIMEOUT)  
+                )  
               
             formatted = self._format_results(results)  
-            docs = await self._fetch_clean_content([r.url for r in results.results])  
+            with span("fetch_pages"):  
+                docs = await self._fetch_clean_content([r.url for r in results], deadline)  
             
             self.logger.info(
                 "Recherche terminée",
                 extra={
                     "query": query,
                     "results_count": len(docs),
-                    "sources": [doc.metadata['source'] for doc in docs]
+                    "sources": [doc.metadata['source'] for doc in docs],
+                    "elapsed": round(deadline.elapsed(), 3)
                 }
             )
             
             return formatted, docs  
               
+        except asyncio.TimeoutError:  
+            self.logger.warning(
+                "Échéance atteinte pendant la recherche",
+                extra={
+                    "query": query,
+                    "elapsed": round(deadline.elapsed(), 3)
+                }
+            )
+            return "Délai de recherche dépassé", []  
         except Exception as e:  
             self.logger.error(
                 "Erreur de recherche",
@@ -57,77 +109,135 @@ class WebSearcher:
             )
             return "Erreur lors de la recherche", []  
   
-    async def _fetch_clean_content(self, urls: List[str]) -> List[Document]:  
-        """Récupère et nettoie le contenu des URLs"""  
-        docs = []  
-        for url in urls:  
-            try:  
-                content = await self._scrape_and_clean(url)  
-                docs.append(Document(  
-                    page_content=content,  
-                    metadata={"source": url}  
-                ))  
-            except Exception as e:  
-                self.logger.warning(
-                    "Échec du chargement de l'URL",
-                    extra={
-                        "url": url,
-                        "error": str(e)
-                    }
-                )
-                docs.append(Document(  
-                    page_content=f"Impossible de charger le contenu de {url}",  
-                    metadata={"source": url, "error": True}  
-                ))  
-        return docs  
+    async def _fetch_clean_content(self, urls: List[str], deadline: Optional[Deadline] = None) -> List[Document]:  
+        """
+        Récupère et nettoie le contenu des URLs en parallèle.
+
+        Les pages encore en cours à l'échéance sont abandonnées : le
+        pipeline continue avec les sources déjà arrivées (résultats partiels).
+        """  
+        deadline = deadline or Deadline.unbounded()
+        tasks = {  
+            asyncio.create_task(self._fetch_document(url, deadline)): url  
+            for url in urls  
+        }  
+        if not tasks:  
+            return []  
+  
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())  
+        for task in pending:  
+            task.cancel()  
+        if pending:  
+            self.logger.warning(
+                "Échéance atteinte, pages abandonnées",
+                extra={
+                    "pending_urls": [tasks[task] for task in pending],
+                    "received": len(done)
+                }
+            )
+  
+        # Conserve l'ordre de classement du moteur de recherche  
+        return [task.result() for task in tasks if task in done]  
   
-    async def _scrape_and_clean(self, url: str) -> str:  
-        """Version améliorée avec extraction du contenu principal"""  
+    async def _fetch_document(self, url: str, deadline: Deadline) -> Document:  
+        """Récupère une URL sous forme de Document (avec relance éventuelle)"""  
         try:  
-            loop = asyncio.get_event_loop()  
-            response = await loop.run_in_executor(  
-                None,   
-                lambda: requests.get(url, headers=self.headers, timeout=15)  
+            with span(f"fetch:{url}"):  
+                content = await self._fetch_hedged(url, deadline)  
+            return Document(  
+                page_content=content,  
+                metadata={"source": url}  
             )  
-            response.raise_for_status()  
-              
-            soup = BeautifulSoup(response.text, 'html.parser')  
-              
-            # Suppression des éléments inutiles  
-            for element in soup(['script', 'style', 'nav', 'footer', 'iframe', 'aside', 'form']):  
-                element.decompose()  
-              
-            # Extraction prioritaire des balises article/main  
-            main_content = soup.find(['article', 'main']) or soup  
-              
-            # Nettoyage avancé  
-            text = ' '.join(main_content.stripped_strings)  
-            text = re.sub(r'\s+', ' ', text)  # Espaces multiples  
-            text = re.sub(r'\[[^\]]+\]', '', text)  # Notes [1]  
-            text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '', text)  # Emails  
-              
-            return text[:5000]  # Limite raisonnable  
-          
         except Exception as e:  
             self.logger.warning(
-                "Échec du scraping",
-                exc_info=True,
+                "Échec du chargement de l'URL",
                 extra={
                     "url": url,
                     "error": str(e)
                 }
             )
-            return f"Contenu non disponible - {str(e)}"  
+            return Document(  
+                page_content=f"Impossible de charger le contenu de {url}",  
+                metadata={"source": url, "error": True}  
+            )  
+  
+    async def _fetch_hedged(self, url: str, deadline: Deadline) -> str:  
+        """
+        Lance le scraping d'une URL; si la réponse tarde au-delà du
+        percentile configuré des latences observées, une seconde requête
+        identique est lancée et la première réponse réussie gagne.
+        Les tentatives en cours sont annulées à la sortie (y compris
+        lorsque l'échéance annule la récupération).
+        """  
+        primary = asyncio.create_task(self._scrape_and_clean(url, deadline))  
+        attempts = [primary]  
+        try:  
+            if not config.SEARCH_HEDGE_ENABLED:  
+                return await primary  
+  
+            hedge_delay = self.fetch_latencies.percentile(  
+                config.SEARCH_HEDGE_PERCENTILE,  
+                default=config.SEARCH_HEDGE_DELAY  
+            )  
+            remaining = deadline.remaining()  
+            if remaining is not None and hedge_delay >= remaining:  
+                return await primary  
+  
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)  
+            if done:  
+                return primary.result()  
+  
+            self.logger.info(
+                "Relance d'une page lente",
+                extra={
+                    "url": url,
+                    "hedge_delay": round(hedge_delay, 3)
+                }
+            )
+            attempts.append(asyncio.create_task(self._scrape_and_clean(url, deadline)))  
+            contenders = set(attempts)  
+            while contenders:  
+                done, contenders = await asyncio.wait(contenders, return_when=asyncio.FIRST_COMPLETED)  
+                for task in done:  
+                    if task.exception() is None:  
+                        return task.result()  
+            # Les deux tentatives ont échoué : on remonte l'erreur initiale  
+            return primary.result()  
+        finally:  
+            for task in attempts:  
+                if not task.done():  
+                    task.cancel()  
+  
+    async def _scrape_and_clean(self, url: str, deadline: Optional[Deadline] = None) -> str:  
+        """
+        Version améliorée avec extraction du contenu principal
+
+        Raises:
+            requests.RequestException: En cas d'échec HTTP (traité par
+                _fetch_hedged / _fetch_document)
+        """  
+        timeout = deadline.timeout(config.SEARCH_FETCH_TIMEOUT) if deadline else config.SEARCH_FETCH_TIMEOUT  
+        started = time.monotonic()  
+        loop = asyncio.get_running_loop()  
+        response = await loop.run_in_executor(  
+            self.fetch_executor,   
+            lambda: requests.get(url, headers=self.headers, timeout=max(timeout, 0.1))  
+        )  
+        response.raise_for_status()  
+        self.fetch_latencies.record(time.monotonic() - started)  
+          
+        return clean_html(response.text, max_length=5000)  # Limite raisonnable  
   
-    def _format_results(self, results) -> str:  
+    @staticmethod  
+    def _format_results(results: List[SearchResult]) -> str:  
         """Génère des résumés pertinents"""  
         output = []  
-        for i, r in enumerate(results.results, 1):  
+        for i, r in enumerate(results, 1):  
             title = r.title or "Sans titre"  
             url = r.url  
               
             # Génération de résumé améliorée  
-            if hasattr(r, 'text') and r.text:  
+            if r.text:  
                 summary = ' '.join(r.text.split()[:50]) + "..."  # 50 premiers mots  
             else:  
                 summary = "Aucun contenu textuel disponible"  
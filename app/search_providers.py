@@ -0,0 +1,371 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+from urllib.parse import urlsplit, urlunsplit
+
+from exa_py import Exa
+from config import config
+from utils.logging_service import LoggingService
+from utils.deadline import Deadline
+from utils.profiling import span
+
+try:
+    from exa_py import AsyncExa
+except ImportError:  # exa-py < 1.9
+    AsyncExa = None
+
+try:
+    from firecrawl import AsyncFirecrawl
+except ImportError:  # firecrawl < 2.0
+    AsyncFirecrawl = None
+
+
+class ProviderUnavailableError(Exception):
+    """Levée lorsqu'aucun fournisseur de recherche ne peut répondre"""
+
+
+@dataclass
+class SearchResult:
+    """Résultat de recherche normalisé, indépendant du fournisseur"""
+    url: str
+    title: Optional[str] = None
+    text: Optional[str] = None
+    provider: str = ""
+
+
+def normalize_url(url: str) -> str:
+    """Normalise une URL pour la déduplication (schéma/hôte en minuscules, sans fragment ni '/' final)"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par fournisseur.
+
+    Après `failure_threshold` échecs consécutifs, le fournisseur est ignoré
+    pendant `reset_timeout` secondes, puis une requête d'essai (half-open)
+    décide de sa réouverture.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class SearchProvider(ABC):
+    """Classe abstraite des fournisseurs de recherche asynchrones"""
+
+    name: str = ""
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self.logger = LoggingService().get_logger(self.__class__.__name__)
+
+    @abstractmethod
+    async def search(self, query: str, num_results: int) -> List[SearchResult]:
+        """Exécute la recherche et retourne des résultats normalisés"""
+        pass
+
+
+class ExaProvider(SearchProvider):
+    """Fournisseur Exa (client asynchrone natif si disponible)"""
+
+    name = "exa"
+
+    def __init__(self, api_key: Optional[str]):
+        super().__init__(api_key)
+        self.client = AsyncExa(api_key) if AsyncExa else Exa(api_key)
+
+    async def search(self, query: str, num_results: int) -> List[SearchResult]:
+        kwargs = {
+            "num_results": num_results,
+            "use_autoprompt": config.SEARCH_AUTOPROMPT,
+            "text": {"include_html_tags": False}
+        }
+        if AsyncExa:
+            response = await self.client.search_and_contents(query, **kwargs)
+        else:
+            response = await asyncio.to_thread(self.client.search_and_contents, query, **kwargs)
+
+        return [
+            SearchResult(url=r.url, title=r.title, text=getattr(r, "text", None), provider=self.name)
+            for r in response.results
+        ]
+
+
+class FirecrawlProvider(SearchProvider):
+    """Fournisseur Firecrawl (API v2 asynchrone, ou v1 synchrone en thread)"""
+
+    name = "firecrawl"
+
+    def __init__(self, api_key: Optional[str]):
+        super().__init__(api_key)
+        if AsyncFirecrawl:
+            self.client = AsyncFirecrawl(api_key=api_key)
+        else:
+            from firecrawl import FirecrawlApp
+            self.client = FirecrawlApp(api_key=api_key)
+
+    async def search(self, query: str, num_results: int) -> List[SearchResult]:
+        if AsyncFirecrawl:
+            response = await self.client.search(query, limit=num_results)
+        else:
+            response = await asyncio.to_thread(self.client.search, query, limit=num_results)
+
+        results = []
+        for item in self._items(response):
+            url = self._field(item, "url")
+            if not url:
+                continue
+            results.append(SearchResult(
+                url=url,
+                title=self._field(item, "title"),
+                text=self._field(item, "markdown") or self._field(item, "description"),
+                provider=self.name
+            ))
+        return results
+
+    @staticmethod
+    def _items(response: Any) -> list:
+        """Extrait la liste de résultats quelle que soit la version du SDK"""
+        for key in ("web", "data"):
+            items = response.get(key) if isinstance(response, dict) else getattr(response, key, None)
+            if items:
+                return list(items)
+        return []
+
+    @staticmethod
+    def _field(item: Any, key: str) -> Optional[str]:
+        if isinstance(item, dict):
+            value = item.get(key)
+            metadata = item.get("metadata") or {}
+        else:
+            value = getattr(item, key, None)
+            metadata = getattr(item, "metadata", None) or {}
+        if value is None and metadata:
+            value = metadata.get(key) if isinstance(metadata, dict) else getattr(metadata, key, None)
+        return value
+
+
+class SearchRouter:
+    """
+    Routeur de recherche multi-fournisseurs.
+
+    Modes (SEARCH_MODE) :
+    - single  : fournisseur principal, bascule sur le suivant en cas d'échec
+    - race    : tous les fournisseurs en parallèle, la première réponse non vide gagne
+    - fanout  : tous les fournisseurs en parallèle, résultats fusionnés et dédupliqués
+
+    Chaque fournisseur a son propre timeout et son disjoncteur : un
+    fournisseur lent ou en panne est écarté sans pénaliser la latence.
+    """
+
+    PROVIDER_REGISTRY: Dict[str, Type[SearchProvider]] = {
+        "exa": ExaProvider,
+        "firecrawl": FirecrawlProvider
+    }
+
+    MODES = ("single", "race", "fanout")
+
+    def __init__(self, providers: List[SearchProvider], mode: str = "single", timeout: Optional[float] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de recherche non supporté: {mode}")
+        if not providers:
+            raise ValueError("Aucun fournisseur de recherche configuré")
+        self.providers = providers
+        self.mode = mode
+        self.timeout = timeout
+        self.breakers = {
+            provider.name: CircuitBreaker(config.SEARCH_BREAKER_FAILURES, config.SEARCH_BREAKER_RESET)
+            for provider in providers
+        }
+        self.logger = LoggingService().get_logger(self.__class__.__name__)
+
+    @staticmethod
+    def _provider_api_key(name: str) -> Optional[str]:
+        """
+        Clé API d'un fournisseur : sa variable dédiée, ou SEARCH_API_KEY
+        uniquement pour le fournisseur principal (SEARCH_PROVIDER), à qui
+        cette clé était destinée
+        """
+        dedicated = {"exa": config.EXA_API_KEY, "firecrawl": config.FIRECRAWL_API_KEY}.get(name)
+        if dedicated:
+            return dedicated
+        if name == config.SEARCH_PROVIDER:
+            return config.SEARCH_API_KEY or None
+        return None
+
+    @classmethod
+    def from_config(cls) -> "SearchRouter":
+        """
+        Construit le routeur à partir de SEARCH_PROVIDERS / SEARCH_MODE.
+        Les fournisseurs sans clé API (ou dont le client ne peut être créé)
+        sont ignorés avec un avertissement.
+
+        Raises:
+            ValueError: Fournisseur inconnu, ou aucun fournisseur utilisable
+        """
+        logger = LoggingService().get_logger(cls.__name__)
+        providers = []
+        for name in config.SEARCH_PROVIDERS:
+            if name not in cls.PROVIDER_REGISTRY:
+                raise ValueError(f"Fournisseur de recherche non supporté: {name}")
+            api_key = cls._provider_api_key(name)
+            if not api_key:
+                logger.warning("Fournisseur de recherche ignoré : clé API absente", extra={"provider": name})
+                continue
+            try:
+                providers.append(cls.PROVIDER_REGISTRY[name](api_key))
+            except Exception as error:
+                logger.warning(
+                    "Fournisseur de recherche ignoré : initialisation impossible",
+                    extra={"provider": name, "error": str(error)}
+                )
+        if not providers:
+            raise ValueError(
+                f"Aucun fournisseur de recherche utilisable parmi {', '.join(config.SEARCH_PROVIDERS)} "
+                "(renseigner EXA_API_KEY / FIRECRAWL_API_KEY)"
+            )
+        return cls(providers, mode=config.SEARCH_MODE, timeout=config.SEARCH_PROVIDER_TIMEOUT)
+
+    async def search(self, query: str, num_results: int, deadline: Optional[Deadline] = None) -> List[SearchResult]:
+        """
+        Recherche selon le mode configuré
+
+        Raises:
+            ProviderUnavailableError: Si aucun fournisseur n'a répondu
+        """
+        deadline = deadline or Deadline.unbounded()
+        available = [p for p in self.providers if self.breakers[p.name].allow()]
+        if not available:
+            raise ProviderUnavailableError("Tous les fournisseurs de recherche sont indisponibles")
+
+        if self.mode == "single":
+            return await self._search_sequential(available, query, num_results, deadline)
+        if self.mode == "race":
+            return await self._search_race(available, query, num_results, deadline)
+        return await self._search_fanout(available, query, num_results, deadline)
+
+    async def _call(self, provider: SearchProvider, query: str, num_results: int, deadline: Deadline) -> List[SearchResult]:
+        """Appelle un fournisseur sous timeout et met à jour son disjoncteur"""
+        breaker = self.breakers[provider.name]
+        started = time.monotonic()
+        try:
+            with span(f"provider:{provider.name}"):
+                results = await asyncio.wait_for(
+                    provider.search(query, num_results),
+                    timeout=deadline.timeout(self.timeout)
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            breaker.record_failure()
+            self.logger.warning(
+                "Échec du fournisseur de recherche",
+                extra={
+                    "provider": provider.name,
+                    "error": str(error) or error.__class__.__name__,
+                    "breaker_state": breaker.state,
+                    "elapsed": round(time.monotonic() - started, 3)
+                }
+            )
+            raise
+        breaker.record_success()
+        self.logger.info(
+            "Réponse du fournisseur de recherche",
+            extra={
+                "provider": provider.name,
+                "results_count": len(results),
+                "elapsed": round(time.monotonic() - started, 3)
+            }
+        )
+        return results
+
+    async def _search_sequential(self, providers, query, num_results, deadline) -> List[SearchResult]:
+        for provider in providers:
+            try:
+                return await self._call(provider, query, num_results, deadline)
+            except Exception:
+                if deadline.expired():
+                    break
+        raise ProviderUnavailableError("Aucun fournisseur de recherche n'a répondu")
+
+    async def _search_race(self, providers, query, num_results, deadline) -> List[SearchResult]:
+        pending = {
+            asyncio.create_task(self._call(provider, query, num_results, deadline))
+            for provider in providers
+        }
+        fallback: Optional[List[SearchResult]] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    if task.result():
+                        return task.result()
+                    fallback = task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return fallback
+        raise ProviderUnavailableError("Aucun fournisseur de recherche n'a répondu")
+
+    async def _search_fanout(self, providers, query, num_results, deadline) -> List[SearchResult]:
+        outcomes = await asyncio.gather(
+            *(self._call(provider, query, num_results, deadline) for provider in providers),
+            return_exceptions=True
+        )
+        result_lists = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        if not result_lists:
+            raise ProviderUnavailableError("Aucun fournisseur de recherche n'a répondu")
+        return self.merge(result_lists, num_results)
+
+    @staticmethod
+    def merge(result_lists: List[List[SearchResult]], limit: int) -> List[SearchResult]:
+        """Fusionne les listes par rang (entrelacement) en supprimant les doublons d'URL"""
+        merged: List[SearchResult] = []
+        seen = set()
+        for rank in range(max(len(results) for results in result_lists)):
+            for results in result_lists:
+                if rank >= len(results):
+                    continue
+                key = normalize_url(results[rank].url)
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(results[rank])
+                if len(merged) >= limit:
+                    return merged
+        return merged
+
+    def status(self) -> Dict[str, str]:
+        """État des disjoncteurs par fournisseur"""
+        return {name: breaker.state for name, breaker in self.breakers.items()}
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Set
+
+from langchain_community.vectorstores import FAISS
+from config import config
+from utils.logging_service import LoggingService
+
+
+class SessionContext:
+    """
+    Contexte de récupération d'une session MCP : index vectoriel des
+    documents déjà récupérés et URLs correspondantes
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.vectorstore: Optional[FAISS] = None
+        self.sources: Set[str] = set()
+        self.text_size = 0
+        self.last_access = time.monotonic()
+        # Sérialise les mises à jour de l'index d'une même session
+        self.lock = asyncio.Lock()
+
+    @property
+    def memory_size(self) -> int:
+        """Estimation de l'empreinte mémoire en octets (texte + vecteurs float32)"""
+        vectors = 0
+        if self.vectorstore is not None:
+            vectors = self.vectorstore.index.ntotal * self.vectorstore.index.d * 4
+        return self.text_size + vectors
+
+    def projected_size(self, added_text: int) -> int:
+        """Empreinte estimée après ajout de `added_text` caractères (même ratio texte/vecteurs)"""
+        if not self.text_size:
+            return self.memory_size
+        return self.memory_size + added_text * self.memory_size // self.text_size
+
+    def reset(self) -> None:
+        """Abandonne l'index et les sources de la session"""
+        self.vectorstore = None
+        self.sources = set()
+        self.text_size = 0
+
+    def touch(self) -> None:
+        self.last_access = time.monotonic()
+
+
+class SessionContextStore:
+    """
+    Stockage des contextes de session, avec expiration après inactivité
+    (SESSION_TTL) et plafond mémoire global (SESSION_MAX_MEMORY_MB) :
+    au-delà, les sessions les moins récemment utilisées sont évincées.
+    Chaque session est en outre bornée (SESSION_MAX_SESSION_MB) : une
+    session qui dépasserait ce plafond repart des seules nouvelles sources.
+    """
+
+    def __init__(self,
+                 ttl: float = config.SESSION_TTL,
+                 max_memory: int = config.SESSION_MAX_MEMORY_MB * 1024 * 1024,
+                 max_session_memory: int = config.SESSION_MAX_SESSION_MB * 1024 * 1024):
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_session_memory = min(max_session_memory, max_memory)
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self.logger = LoggingService().get_logger(self.__class__.__name__)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[SessionContext]:
+        """Retourne le contexte de la session s'il existe et n'a pas expiré"""
+        self._purge_expired()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str) -> SessionContext:
+        session = self.get(session_id)
+        if session is None:
+            session = SessionContext(session_id)
+            self._sessions[session_id] = session
+        return session
+
+    def make_room(self, session: SessionContext, added_text: int) -> None:
+        """
+        Vide le contexte d'une session si l'ajout de `added_text` caractères
+        lui ferait dépasser son plafond (les sources les plus anciennes sont
+        abandonnées, les nouvelles forment un nouvel index)
+        """
+        if session.vectorstore is None or session.projected_size(added_text) <= self.max_session_memory:
+            return
+        self.logger.info(
+            "Contexte de session réinitialisé (plafond par session)",
+            extra={
+                "session_id": session.session_id,
+                "memory_size": session.memory_size,
+                "dropped_sources": len(session.sources)
+            }
+        )
+        session.reset()
+
+    def enforce_memory_cap(self) -> None:
+        """Évince les sessions les plus anciennes tant que le plafond est dépassé"""
+        total = sum(session.memory_size for session in self._sessions.values())
+        while total > self.max_memory and len(self._sessions) > 1:
+            session_id, session = self._sessions.popitem(last=False)
+            total -= session.memory_size
+            self.logger.info(
+                "Session évincée (plafond mémoire)",
+                extra={
+                    "session_id": session_id,
+                    "memory_size": session.memory_size
+                }
+            )
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if now - session.last_access > self.ttl
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+        if expired:
+            self.logger.info("Sessions expirées supprimées", extra={"count": len(expired)})
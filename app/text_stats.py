@@ -0,0 +1,186 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+# Mot : suite de caractères alphanumériques, apostrophes/traits d'union internes inclus
+WORD_RE = re.compile(r"\w+(?:['’-]\w+)*")
+# Fin de phrase : ponctuation finale suivie d'un espace ou de la fin du texte
+SENTENCE_END_RE = re.compile(r"[.!?…]+(?=\s|$)")
+
+# Mots outils exclus des fréquences (français / anglais)
+STOPWORDS = frozenset("""
+le la les un une des du de d l au aux et ou mais donc or ni car que qui quoi dont où ce cet cette ces
+son sa ses leur leurs mon ma mes ton ta tes notre nos votre vos il elle ils elles on nous vous je tu
+se s en y ne pas plus par pour sur dans avec sans sous entre est sont été être a ont avoir fait c qu
+the a an and or but of to in on at by for with from as is are was were be been it its this that
+these those he she they we you i not no do does did have has had will would can could
+""".split())
+
+
+class TextStatistics:
+    """
+    Statistiques de texte incrémentales.
+
+    Le texte est fourni par morceaux (`feed`) : seuls des compteurs sont
+    conservés (mots, n-grammes, longueurs de phrases), la mémoire dépend du
+    vocabulaire et non de la taille du texte. Les n-grammes sont calculés à
+    l'intérieur des phrases, y compris à cheval sur deux morceaux.
+    """
+
+    def __init__(self, ngram_sizes: Tuple[int, ...] = (2, 3), max_ngrams: int = 100_000):
+        self.ngram_sizes = ngram_sizes
+        self.max_ngrams = max_ngrams
+
+        self.chars = 0
+        self.words = 0
+        self.word_chars = 0
+        self.word_counts: Counter = Counter()
+        self.ngram_counts = {n: Counter() for n in ngram_sizes}
+
+        self.sentences = 0
+        self.sentence_words_sum = 0
+        self.sentence_words_sq = 0
+        self.sentence_min: Optional[int] = None
+        self.sentence_max = 0
+
+        self._carry = ""
+        self._sentence_words = 0
+        self._tail: List[str] = []
+
+    def feed(self, chunk: str) -> None:
+        """Ajoute un morceau de texte (coupé n'importe où)"""
+        self.chars += len(chunk)
+        text = self._carry + chunk
+        # Le dernier mot peut être incomplet : il est reporté au morceau suivant
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t")) + 1
+        if not cut and len(text) > 65536:
+            cut = len(text)  # Texte sans espace : on borne le reliquat
+        self._carry = text[cut:]
+        self._process(text[:cut])
+
+    def close(self) -> "TextStatistics":
+        """Traite le reliquat et clôt la dernière phrase"""
+        if self._carry:
+            self._process(self._carry)
+            self._carry = ""
+        self._end_sentence()
+        return self
+
+    def _process(self, segment: str) -> None:
+        pieces = SENTENCE_END_RE.split(segment)
+        for index, piece in enumerate(pieces):
+            if index > 0:
+                self._end_sentence()
+            tokens = WORD_RE.findall(piece.lower())
+            if not tokens:
+                continue
+            self.words += len(tokens)
+            self.word_chars += sum(map(len, tokens))
+            self.word_counts.update(tokens)
+            self._sentence_words += len(tokens)
+            window = self._tail + tokens
+            self._count_ngrams(window, len(self._tail))
+            keep = max(self.ngram_sizes, default=1) - 1
+            self._tail = window[-keep:] if keep else []
+
+    def _count_ngrams(self, tokens: List[str], tail_length: int) -> None:
+        for n in self.ngram_sizes:
+            # Les n-grammes entièrement contenus dans le reliquat ont déjà été comptés
+            start = max(0, tail_length - n + 1)
+            grams = zip(*(tokens[start + i:] for i in range(n)))
+            counts = self.ngram_counts[n]
+            counts.update(" ".join(gram) for gram in grams)
+            if len(counts) > self.max_ngrams:
+                # Élagage approximatif : on conserve la moitié la plus fréquente
+                self.ngram_counts[n] = Counter(dict(counts.most_common(self.max_ngrams // 2)))
+
+    def _end_sentence(self) -> None:
+        words = self._sentence_words
+        self._sentence_words = 0
+        self._tail = []
+        if not words:
+            return
+        self.sentences += 1
+        self.sentence_words_sum += words
+        self.sentence_words_sq += words * words
+        self.sentence_min = words if self.sentence_min is None else min(self.sentence_min, words)
+        self.sentence_max = max(self.sentence_max, words)
+
+    @property
+    def lexical_density(self) -> float:
+        """Ratio mots uniques / total mots"""
+        return len(self.word_counts) / self.words if self.words else 0.0
+
+    @property
+    def sentence_mean(self) -> float:
+        return self.sentence_words_sum / self.sentences if self.sentences else 0.0
+
+    @property
+    def sentence_stdev(self) -> float:
+        if not self.sentences:
+            return 0.0
+        variance = self.sentence_words_sq / self.sentences - self.sentence_mean ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    def top_words(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Mots les plus fréquents, hors mots outils"""
+        top = []
+        for word, count in self.word_counts.most_common():
+            if word not in STOPWORDS and len(word) > 2 and not word.isdigit():
+                top.append((word, count))
+                if len(top) >= n:
+                    break
+        return top
+
+    def top_ngrams(self, size: int, n: int = 10) -> List[Tuple[str, int]]:
+        """N-grammes les plus fréquents ne commençant ni ne finissant par un mot outil"""
+        top = []
+        for gram, count in self.ngram_counts.get(size, Counter()).most_common():
+            words = gram.split(" ")
+            if count > 1 and words[0] not in STOPWORDS and words[-1] not in STOPWORDS:
+                top.append((gram, count))
+                if len(top) >= n:
+                    break
+        return top
+
+
+def analyze_stream(chunks: Iterable[str], **options) -> TextStatistics:
+    """Calcule les statistiques d'un flux de morceaux de texte"""
+    stats = TextStatistics(**options)
+    for chunk in chunks:
+        stats.feed(chunk)
+    return stats.close()
+
+
+def iter_chunks(text: str, size: int) -> Iterable[str]:
+    """Découpe un texte en morceaux de taille fixe"""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def kmeans(vectors, k: int, iterations: int = 20, seed: int = 0):
+    """
+    K-moyennes sur des vecteurs normalisés (similarité cosinus)
+
+    Returns:
+        Tableau des indices de cluster par vecteur
+    """
+    import numpy as np
+
+    data = np.array(vectors, dtype=np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True) + 1e-12
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)]
+    labels = None
+    for _ in range(iterations):
+        new_labels = np.argmax(data @ centroids.T, axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(k):
+            members = data[labels == cluster]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[cluster] = centroid / (np.linalg.norm(centroid) + 1e-12)
+    return labels
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Message présenté au client lorsqu'une étape est interrompue par l'échéance
+DEADLINE_MESSAGE = "Échéance atteinte, résultat partiel"
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """Levée lorsque l'échéance d'une requête interrompt une opération"""
+
+    def __init__(self, message: str = DEADLINE_MESSAGE):
+        super().__init__(message)
+
+
+class Deadline:
+    """
+    Échéance absolue d'une requête, propagée du serveur MCP jusqu'aux
+    services (recherche, scraping, résumé).
+
+    Chaque étape consulte le temps restant plutôt qu'un timeout fixe, afin
+    que la latence de bout en bout reste bornée quel que soit le nombre
+    d'étapes traversées.
+    """
+
+    def __init__(self, timeout: Optional[float]):
+        """
+        Args:
+            timeout: Budget en secondes à partir de maintenant (None ou <= 0 = illimité)
+        """
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + timeout if timeout and timeout > 0 else None
+
+    @classmethod
+    def unbounded(cls) -> "Deadline":
+        """Retourne une échéance sans limite"""
+        return cls(None)
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> Optional[float]:
+        """Temps restant en secondes (None si illimité, jamais négatif)"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout à appliquer à une opération : le plus petit entre le temps
+        restant et le plafond propre à l'opération
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if cap is None:
+            return remaining
+        return min(remaining, cap)
+
+    def sub(self, fraction: float) -> "Deadline":
+        """
+        Crée une sous-échéance couvrant une fraction du temps restant,
+        pour réserver du budget aux étapes suivantes
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return Deadline.unbounded()
+        return Deadline(max(remaining * fraction, 0.001))
+
+
+async def run_within(awaitable: Awaitable[T], deadline: Optional[Deadline], cap: Optional[float] = None) -> T:
+    """
+    Exécute un awaitable en respectant l'échéance
+
+    Raises:
+        DeadlineExceededError: Si l'échéance (ou le plafond) est atteinte
+            (sous-classe d'asyncio.TimeoutError, avec un message explicite)
+    """
+    timeout = deadline.timeout(cap) if deadline else cap
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError as error:
+        if isinstance(error, DeadlineExceededError):
+            raise
+        raise DeadlineExceededError() from error
+
+
+class LatencyTracker:
+    """
+    Fenêtre glissante de latences observées, utilisée pour calculer le
+    délai de relance (hedging) à partir d'un percentile
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 10):
+        self._samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, duration: float) -> None:
+        self._samples.append(duration)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float, default: Optional[float] = None) -> Optional[float]:
+        """
+        Percentile (0-1) des latences observées, ou `default` tant que
+        l'échantillon est insuffisant
+        """
+        if len(self._samples) < self.min_samples:
+            return default
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
@@ -0,0 +1,240 @@
+import asyncio
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import random
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import config
+from utils.logging_service import LoggingService
+
+# Profil de la requête en cours (propagé aux tâches asyncio créées pendant la requête)
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """Données de profilage d'une requête : étapes chronométrées, arbre d'appels, piles asyncio"""
+
+    def __init__(self, agent_type: str, query: str, sampled: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.agent_type = agent_type
+        self.query_sample = query[:200]
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.task_snapshot: List[Dict[str, Any]] = []
+        self.call_tree: Optional[str] = None
+        self.pstats_data: Optional[bytes] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "agent_type": self.agent_type,
+            "query_sample": self.query_sample,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "sampled": self.sampled,
+            "slow": bool(self.task_snapshot)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "spans": self.spans,
+            "task_snapshot": self.task_snapshot,
+            "call_tree": self.call_tree
+        }
+
+
+class _Span:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: RequestProfile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        task = asyncio.current_task()
+        self.profile.spans.append({
+            "name": self.name,
+            "start_ms": round((self.start - self.profile.started) * 1000, 2),
+            "duration_ms": round((end - self.start) * 1000, 2),
+            "task": task.get_name() if task else None,
+            "error": exc_type.__name__ if exc_type else None
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """
+    Chronomètre une étape de la requête en cours.
+    Sans profil actif, retourne un gestionnaire vide (coût négligeable).
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name)
+
+
+def _await_chain(coro) -> List[str]:
+    """Chaîne des coroutines en attente (fichier:ligne fonction), de la tâche vers le point bloquant"""
+    chain = []
+    while coro is not None and len(chain) < 50:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            chain.append(f"{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_name}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return chain
+
+
+class RequestProfiler:
+    """
+    Profilage optionnel des requêtes.
+
+    - Chaque requête est découpée en étapes chronométrées (`span`), y
+      compris dans les tâches asyncio qu'elle crée.
+    - Une fraction PROFILING_SAMPLE_RATE des requêtes est profilée avec
+      cProfile (arbre d'appels). cProfile observe tout le thread : les
+      autres requêtes concurrentes apparaissent aussi dans ce profil.
+    - Toute requête dépassant PROFILING_SLOW_THRESHOLD est capturée, avec
+      un instantané des piles asyncio pris au moment du dépassement.
+
+    Désactivé (PROFILING_ENABLED=false), le profileur n'ajoute aucun travail.
+    """
+
+    # cProfile ne supporte qu'un profileur actif à la fois par processus
+    _cprofile_active = False
+
+    def __init__(self,
+                 enabled: bool = config.PROFILING_ENABLED,
+                 sample_rate: float = config.PROFILING_SAMPLE_RATE,
+                 slow_threshold: float = config.PROFILING_SLOW_THRESHOLD,
+                 max_profiles: int = config.PROFILING_MAX_PROFILES,
+                 directory: Optional[str] = config.PROFILING_DIR):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.directory = Path(directory) if directory else None
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self.max_profiles = max_profiles
+        self.logger = LoggingService().get_logger(self.__class__.__name__)
+
+    @asynccontextmanager
+    async def profile(self, agent_type: str, query: str):
+        """Profile la requête exécutée dans le bloc"""
+        if not self.enabled:
+            yield None
+            return
+
+        sampled = (
+            self.sample_rate > 0
+            and random.random() < self.sample_rate
+            and not RequestProfiler._cprofile_active
+        )
+        profile = RequestProfile(agent_type, query, sampled)
+        token = _current_profile.set(profile)
+
+        watchdog = None
+        if self.slow_threshold > 0:
+            watchdog = asyncio.get_running_loop().call_later(
+                self.slow_threshold, self._snapshot_tasks, profile, asyncio.current_task()
+            )
+
+        profiler = None
+        if sampled:
+            profiler = cProfile.Profile()
+            RequestProfiler._cprofile_active = True
+            profiler.enable()
+        try:
+            yield profile
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                RequestProfiler._cprofile_active = False
+            if watchdog is not None:
+                watchdog.cancel()
+            _current_profile.reset(token)
+            profile.duration = round(time.perf_counter() - profile.started, 4)
+
+            if profiler is not None or profile.task_snapshot:
+                self._store(profile, profiler)
+
+    def _snapshot_tasks(self, profile: RequestProfile, request_task: Optional[asyncio.Task]) -> None:
+        """Capture les piles des tâches asyncio quand la requête dépasse le seuil"""
+        snapshot = []
+        for task in asyncio.all_tasks():
+            if task.done():
+                continue
+            snapshot.append({
+                "task": task.get_name(),
+                "request_task": task is request_task,
+                "await_chain": _await_chain(task.get_coro())
+            })
+        profile.task_snapshot = snapshot
+        self.logger.warning(
+            "Requête lente détectée",
+            extra={
+                "profile_id": profile.id,
+                "agent_type": profile.agent_type,
+                "threshold": self.slow_threshold,
+                "tasks": len(snapshot)
+            }
+        )
+
+    def _store(self, profile: RequestProfile, profiler: Optional[cProfile.Profile]) -> None:
+        if profiler is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats("cumulative").print_stats(config.PROFILING_TOP_FUNCTIONS)
+            profile.call_tree = stream.getvalue()
+            # Format compatible avec pstats.Stats(<fichier>) / snakeviz
+            profile.pstats_data = marshal.dumps(stats.stats)
+
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{profile.id}.json").write_text(
+                json.dumps(profile.to_dict(), ensure_ascii=False, default=str), encoding="utf-8"
+            )
+            if profile.pstats_data:
+                (self.directory / f"{profile.id}.prof").write_bytes(profile.pstats_data)
+
+        self.logger.info("Profil capturé", extra=profile.summary())
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Résumé des profils capturés, du plus récent au plus ancien"""
+        return [profile.summary() for profile in reversed(self._profiles.values())]
+
+    def get_profile(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
@@ -0,0 +1,104 @@
+"""
+Compare le découpage LangChain (RecursiveCharacterTextSplitter) au
+découpage par positions (OffsetChunker) : temps, mémoire allouée et
+nombre de fragments.
+
+    python benchmarks/chunking_benchmark.py --pages 200 --page-size 20000
+    python benchmarks/chunking_benchmark.py --dir ./docs
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from chunking import OffsetChunker  # noqa: E402
+
+WORDS = (
+    "agent recherche modèle contexte protocole données réponse source document index "
+    "vecteur requête synthèse ollama embedding fragment page serveur outil analyse"
+).split()
+
+
+def synthetic_pages(count: int, size: int, seed: int = 0) -> list:
+    """Pages aléatoires avec paragraphes et lignes de longueurs variables"""
+    rng = random.Random(seed)
+    pages = []
+    for page in range(count):
+        parts, length = [], 0
+        while length < size:
+            line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40)))
+            separator = "\n\n" if rng.random() < 0.3 else "\n"
+            parts.append(line + separator)
+            length += len(line) + len(separator)
+        pages.append(Document(page_content="".join(parts)[:size], metadata={"source": f"page-{page}"}))
+    return pages
+
+
+def directory_pages(directory: str) -> list:
+    return [
+        Document(page_content=path.read_text(encoding="utf-8", errors="replace"), metadata={"source": str(path)})
+        for path in sorted(Path(directory).rglob("*"))
+        if path.is_file() and path.suffix.lower() in {".txt", ".md", ".html", ".htm"}
+    ]
+
+
+def measure(label: str, func, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        del result
+
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<34} {min(timings) * 1000:>9.1f} ms  {sum(timings) / len(timings) * 1000:>9.1f} ms  "
+        f"{current / 1024 / 1024:>9.2f} Mo  {peak / 1024 / 1024:>9.2f} Mo  {len(result):>8}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=20000)
+    parser.add_argument("--dir", help="Répertoire de fichiers réels à la place des pages synthétiques")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--chunk-overlap", type=int, default=512)
+    parser.add_argument("--returned", type=int, default=3, help="Fragments matérialisés (résultats de recherche)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = directory_pages(args.dir) if args.dir else synthetic_pages(args.pages, args.page_size)
+    total = sum(len(doc.page_content) for doc in documents)
+    print(f"{len(documents)} pages, {total / 1024 / 1024:.2f} Mo, chunk_size={args.chunk_size}, overlap={args.chunk_overlap}\n")
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    chunker = OffsetChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    def offset_with_documents():
+        corpus = chunker.chunk_documents(documents)
+        return [corpus.document(index) for index in range(min(args.returned, len(corpus)))]
+
+    def offset_with_texts():
+        corpus = chunker.chunk_documents(documents)
+        return list(corpus.iter_texts())
+
+    print(f"{'méthode':<34} {'min':>12} {'moyenne':>12} {'retenu':>12} {'pic':>12} {'fragments':>9}")
+    measure("RecursiveCharacterTextSplitter", lambda: splitter.split_documents(documents), args.repeat)
+    measure("OffsetChunker (positions)", lambda: chunker.chunk_documents(documents), args.repeat)
+    measure(f"OffsetChunker + {args.returned} Documents", offset_with_documents, args.repeat)
+    measure("OffsetChunker + tous les textes", offset_with_texts, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Mesure l'effet de la réduction de dimension des embeddings (ACP, troncature)
+sur la recherche : rappel@k par rapport à la recherche exacte en pleine
+dimension, mémoire de l'index et temps de recherche.
+
+    python benchmarks/projection_benchmark.py --count 20000 --dim 1024 --dims 64,128,256,512
+    python benchmarks/projection_benchmark.py --vectors corpus.npy --queries-file queries.npy
+
+Les vecteurs synthétiques ont un spectre décroissant (comme des embeddings
+réels); --rotate mélange les axes, ce qui défavorise la troncature comme
+avec un modèle non entraîné en Matryoshka.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from projection import PCAProjection, TruncationProjection  # noqa: E402
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def synthetic_vectors(count: int, dim: int, decay: float, rotate: bool, seed: int) -> np.ndarray:
+    """Vecteurs normalisés dont la variance décroît en 1/i^decay selon les axes"""
+    rng = np.random.default_rng(seed)
+    scales = np.arange(1, dim + 1, dtype=np.float32) ** -decay
+    vectors = rng.standard_normal((count, dim), dtype=np.float32) * scales
+    if rotate:
+        basis, _ = np.linalg.qr(np.random.default_rng(seed + 1).standard_normal((dim, dim)))
+        vectors = vectors @ basis.astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_index(vectors: np.ndarray):
+    """Index exact L2, comme RAGProcessor._new_index (numpy si faiss est absent)"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if faiss is None:
+        return vectors
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+def search(index, queries: np.ndarray, k: int) -> np.ndarray:
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    if faiss is not None:
+        return index.search(queries, k)[1]
+    distances = (queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ index.T + (index ** 2).sum(axis=1)
+    nearest = np.argpartition(distances, k, axis=1)[:, :k]
+    order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    k = expected.shape[1]
+    hits = sum(len(set(row_found).intersection(row_expected)) for row_found, row_expected in zip(found, expected))
+    return hits / (k * len(expected))
+
+
+def measure(label: str, corpus: np.ndarray, queries: np.ndarray, expected: np.ndarray, k: int) -> None:
+    index = build_index(corpus)
+    started = time.perf_counter()
+    found = search(index, queries, k)
+    elapsed = time.perf_counter() - started
+    memory = corpus.shape[0] * corpus.shape[1] * 4 / 1024 / 1024
+    print(
+        f"{label:<22} {corpus.shape[1]:>6}  {recall_at_k(found, expected):>8.3f}  "
+        f"{memory:>9.1f} Mo  {elapsed / len(queries) * 1000:>9.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help="Fichier .npy d'embeddings réels à la place des vecteurs synthétiques")
+    parser.add_argument("--queries-file", help="Fichier .npy d'embeddings de requêtes (sinon tirées du corpus)")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--decay", type=float, default=0.5, help="Décroissance du spectre synthétique")
+    parser.add_argument("--rotate", action="store_true", help="Axes synthétiques mélangés")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dims", default="64,128,256,512")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fit-sample", type=int, default=2000, help="Équivalent de RAG_PROJECTION_SAMPLE")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = synthetic_vectors(args.count + args.queries, args.dim, args.decay, args.rotate, args.seed)
+
+    if args.queries_file:
+        corpus, queries = vectors, np.load(args.queries_file).astype(np.float32)
+    else:
+        # Requêtes tenues à l'écart du corpus
+        corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+
+    rng = np.random.default_rng(args.seed)
+    sample = corpus[rng.choice(len(corpus), size=min(args.fit_sample, len(corpus)), replace=False)]
+
+    print(f"Corpus: {len(corpus)} vecteurs, dimension {corpus.shape[1]}, {len(queries)} requêtes, k={args.k}")
+    print(f"Recherche: {'faiss IndexFlatL2' if faiss is not None else 'numpy (faiss absent)'}\n")
+    print(f"{'Projection':<22} {'dim':>6}  {'rappel@k':>8}  {'mémoire':>12}  {'requête':>12}")
+
+    expected = search(build_index(corpus), queries, args.k)
+    measure("aucune", corpus, queries, expected, args.k)
+
+    for dimension in sorted(int(value) for value in args.dims.split(",")):
+        if dimension >= corpus.shape[1]:
+            continue
+        projections = [TruncationProjection(dimension)]
+        if dimension <= len(sample):
+            pca = PCAProjection(dimension)
+            pca.fit(sample)
+            projections.append(pca)
+        for projection in projections:
+            measure(
+                projection.kind,
+                projection.transform(corpus),
+                projection.transform(queries),
+                expected,
+                args.k
+            )
+
+
+if __name__ == "__main__":
+    main()
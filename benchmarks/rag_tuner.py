@@ -0,0 +1,400 @@
+"""
+Réglage latence / qualité de RAG_CHUNK_SIZE, RAG_CHUNK_OVERLAP, RAG_RESULTS
+et SEARCH_MAX_RESULTS.
+
+Les requêtes d'un journal JSONL (une requête par ligne : champ "query", ou
+"title" comme dans requests.jsonl, et "keywords" optionnels) sont rejouées
+sur des pages en cache, avec un Ollama simulé. Pour chaque combinaison de
+paramètres, le pipeline d'OllamaAgent (découpage, index, similarité,
+formatage des sources, résumé) est exécuté et mesuré étape par étape :
+
+- recherche : latences enregistrées (fournisseur + page la plus lente)
+- index / similarité : temps CPU réel du découpage et de FAISS, plus le
+  temps d'embedding simulé
+- résumé : prefill et génération simulés à partir du nombre de jetons
+
+La qualité est approchée lexicalement : couverture des termes de la
+requête (ou des "keywords") par les sources transmises au modèle.
+
+    # 1. Enregistrer les pages (recherche web réelle, clés API requises)
+    python benchmarks/rag_tuner.py queries.jsonl --cache .tuner_cache --record
+    # 2. Rejouer et balayer les paramètres (hors ligne)
+    python benchmarks/rag_tuner.py queries.jsonl --cache .tuner_cache \\
+        --chunk-sizes 1024,2048,4096 --overlaps 0,256,512 --k 3,5,8 --max-results 3,5,8
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from agent import SUMMARY_PREFIX, OllamaAgent  # noqa: E402
+from config import config  # noqa: E402
+from rag import RAGProcessor  # noqa: E402
+from search import WebSearcher  # noqa: E402
+from search_providers import SearchResult  # noqa: E402
+from text_stats import STOPWORDS, WORD_RE  # noqa: E402
+
+# Approximation courante pour les tokenizers BPE (texte latin)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def terms(text: str) -> set:
+    return {word for word in WORD_RE.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS}
+
+
+class LatencyModel:
+    """Coûts Ollama simulés (millisecondes)"""
+
+    def __init__(self, embed_call_ms: float, embed_token_ms: float, prefill_token_ms: float,
+                 decode_token_ms: float, output_tokens: int, num_ctx: int):
+        self.embed_call_ms = embed_call_ms
+        self.embed_token_ms = embed_token_ms
+        self.prefill_token_ms = prefill_token_ms
+        self.decode_token_ms = decode_token_ms
+        self.output_tokens = min(output_tokens, config.OLLAMA_MODEL_MAX_TOKENS)
+        self.num_ctx = num_ctx
+
+
+class StubEmbeddings(Embeddings):
+    """
+    Embeddings déterministes par hachage des mots et bigrammes : deux textes
+    partageant du vocabulaire sont proches, sans appel à Ollama. Le temps
+    de calcul réel est décompté et remplacé par le modèle de latence.
+    """
+
+    def __init__(self, model: LatencyModel, dimension: int = 768):
+        self.model = model
+        self.dimension = dimension
+        self.calls = 0
+        self.tokens = 0
+        self.simulated = 0.0
+        self.own_time = 0.0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        words = WORD_RE.findall(text.lower())
+        for feature in itertools.chain(words, map(" ".join, zip(words, words[1:]))):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimension] += 1.0 if value >> 63 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def _account(self, texts: List[str], started: float) -> None:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        self.calls += 1
+        self.tokens += tokens
+        self.simulated += (self.model.embed_call_ms + self.model.embed_token_ms * tokens) / 1000
+        self.own_time += time.perf_counter() - started
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = [self._embed(text) for text in texts]
+        self._account(texts, started)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    def snapshot(self) -> tuple:
+        return self.simulated, self.own_time, self.tokens
+
+
+def cache_path(cache_dir: Path, query: str) -> Path:
+    return cache_dir / f"{hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+def load_queries(path: str) -> List[Dict]:
+    """Charge le journal de requêtes (JSONL)"""
+    queries = []
+    for number, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        query = entry.get("query") or entry.get("prompt") or entry.get("title")
+        if not query:
+            raise ValueError(f"Ligne {number} : champ 'query' (ou 'title') manquant")
+        queries.append({
+            "id": entry.get("request_id") or entry.get("id") or str(number),
+            "query": query,
+            "keywords": entry.get("keywords")
+        })
+    return queries
+
+
+async def record(queries: List[Dict], cache_dir: Path, max_results: int) -> None:
+    """Enregistre résultats de recherche, pages nettoyées et latences réelles"""
+    searcher = WebSearcher()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    async def fetch(url: str) -> Dict:
+        started = time.perf_counter()
+        try:
+            page = {"text": await searcher._scrape_and_clean(url)}
+        except Exception as error:
+            page = {"text": f"Impossible de charger le contenu de {url}", "error": True}
+            print(f"  {url} : {error}")
+        return {**page, "fetch_seconds": round(time.perf_counter() - started, 4)}
+
+    for entry in queries:
+        started = time.perf_counter()
+        try:
+            results = await searcher.router.search(entry["query"], max_results)
+        except Exception as error:
+            print(f"[{entry['id']}] échec de la recherche : {error}")
+            continue
+        search_seconds = time.perf_counter() - started
+        pages = await asyncio.gather(*(fetch(result.url) for result in results))
+        cache_path(cache_dir, entry["query"]).write_text(json.dumps({
+            "query": entry["query"],
+            "search_seconds": round(search_seconds, 4),
+            "results": [
+                {"url": r.url, "title": r.title, "snippet": r.text, "provider": r.provider, **page}
+                for r, page in zip(results, pages)
+            ]
+        }, ensure_ascii=False), encoding="utf-8")
+        print(f"[{entry['id']}] {len(results)} pages enregistrées ({search_seconds:.2f} s)")
+
+
+def quality(reference: set, sources: List[str]) -> Dict[str, float]:
+    """
+    Rappel : part des termes de référence présents dans l'ensemble des sources.
+    Précision : part moyenne de ces termes dans chaque source.
+    """
+    if not reference or not sources:
+        return {"recall": 0.0, "precision": 0.0, "score": 0.0}
+    per_source = [len(reference & terms(source)) / len(reference) for source in sources]
+    recall = len(reference & set().union(*(terms(source) for source in sources))) / len(reference)
+    precision = sum(per_source) / len(per_source)
+    score = 2 * recall * precision / (recall + precision) if recall + precision else 0.0
+    return {"recall": recall, "precision": precision, "score": score}
+
+
+async def replay(entry: Dict, page_cache: Dict, rag: RAGProcessor, embeddings: StubEmbeddings,
+                 model: LatencyModel, k: int, max_results: int) -> Dict:
+    """Rejoue une requête, comme OllamaAgent.query sans contexte de session"""
+    cached = page_cache["results"][:max_results]
+    stages = {"search": page_cache["search_seconds"] + max((r["fetch_seconds"] for r in cached), default=0.0)}
+
+    initial_summary = WebSearcher._format_results([
+        SearchResult(url=r["url"], title=r["title"], text=r["snippet"], provider=r["provider"]) for r in cached
+    ])
+    docs = [
+        Document(
+            page_content=r["text"],
+            metadata={"source": r["url"], "title": r["title"], **({"error": True} if r.get("error") else {})}
+        )
+        for r in cached
+    ]
+
+    async def measured(stage: str, coroutine):
+        simulated, own_time, _ = embeddings.snapshot()
+        started = time.perf_counter()
+        result = await coroutine
+        wall = time.perf_counter() - started
+        stages[stage] = wall - (embeddings.own_time - own_time) + (embeddings.simulated - simulated)
+        return result
+
+    # Pages en erreur écartées comme dans OllamaAgent._index_documents;
+    # sans page chargée, aucun index : contexte vide (échec de récupération)
+    loaded = [doc for doc in docs if not doc.metadata.get('error')]
+    embed_tokens = embeddings.tokens
+    relevant_docs = []
+    if loaded:
+        vectorstore = await measured("rag_index", rag.create_from_documents(loaded))
+        relevant_docs = await measured(
+            "rag_similarity", rag.similarity_search(query=entry["query"], vectorstore=vectorstore, k=k)
+        )
+    else:
+        stages["rag_index"] = stages["rag_similarity"] = 0.0
+    embed_tokens = embeddings.tokens - embed_tokens
+
+    started = time.perf_counter()
+    sources = OllamaAgent._collect_sources(relevant_docs)
+    combined_content = f"{initial_summary}\n\n{OllamaAgent._render_sources(sources)}"
+    prompt_tokens = estimate_tokens(SUMMARY_PREFIX + combined_content)
+    stages["format"] = time.perf_counter() - started
+    stages["summarize"] = (prompt_tokens * model.prefill_token_ms + model.output_tokens * model.decode_token_ms) / 1000
+
+    reference = terms(" ".join(entry["keywords"]) if entry["keywords"] else entry["query"])
+    return {
+        "stages": stages,
+        "total": sum(stages.values()),
+        "prompt_tokens": prompt_tokens,
+        "embed_tokens": embed_tokens,
+        "ctx_overflow": prompt_tokens > model.num_ctx,
+        **quality(reference, [f"{source['title']} {source['excerpt']}" for source in sources])
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def evaluate(queries: List[Dict], caches: Dict[str, Dict], model: LatencyModel,
+                   chunk_size: int, chunk_overlap: int, k: int, max_results: int) -> Dict:
+    embeddings = StubEmbeddings(model)
+    # Projection désactivée : celle de l'index persistant ne correspond pas aux embeddings simulés
+    rag = RAGProcessor(
+        embeddings=embeddings,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        use_projection=False
+    )
+    runs = [
+        await replay(entry, caches[entry["query"]], rag, embeddings, model, k, max_results)
+        for entry in queries
+    ]
+    count = len(runs)
+    return {
+        "RAG_CHUNK_SIZE": chunk_size,
+        "RAG_CHUNK_OVERLAP": chunk_overlap,
+        "RAG_RESULTS": k,
+        "SEARCH_MAX_RESULTS": max_results,
+        "latency_mean": sum(run["total"] for run in runs) / count,
+        "latency_p95": percentile([run["total"] for run in runs], 0.95),
+        "stages": {stage: sum(run["stages"][stage] for run in runs) / count for stage in runs[0]["stages"]},
+        "prompt_tokens": sum(run["prompt_tokens"] for run in runs) / count,
+        "embed_tokens": sum(run["embed_tokens"] for run in runs) / count,
+        "ctx_overflow": sum(run["ctx_overflow"] for run in runs) / count,
+        "recall": sum(run["recall"] for run in runs) / count,
+        "precision": sum(run["precision"] for run in runs) / count,
+        "quality": sum(run["score"] for run in runs) / count
+    }
+
+
+def pareto_frontier(results: List[Dict]) -> List[Dict]:
+    """Configurations non dominées (latence moyenne minimale, qualité maximale)"""
+    frontier, best_quality = [], -1.0
+    for result in sorted(results, key=lambda r: (r["latency_mean"], -r["quality"])):
+        if result["quality"] > best_quality:
+            frontier.append(result)
+            best_quality = result["quality"]
+    return frontier
+
+
+def recommend(frontier: List[Dict], latency_budget: Optional[float], quality_target: float) -> Dict:
+    """
+    Avec un budget de latence : meilleure qualité dans le budget.
+    Sinon : configuration la plus rapide atteignant `quality_target` x la meilleure qualité.
+    """
+    if latency_budget is not None:
+        within = [r for r in frontier if r["latency_mean"] <= latency_budget]
+        if within:
+            return within[-1]
+        return frontier[0]
+    threshold = quality_target * frontier[-1]["quality"]
+    return next(r for r in frontier if r["quality"] >= threshold)
+
+
+def print_table(title: str, results: List[Dict]) -> None:
+    print(f"\n{title}")
+    print(
+        f"{'chunk':>6} {'overlap':>7} {'k':>3} {'pages':>5}  {'latence':>8} {'p95':>7}  "
+        f"{'search':>7} {'index':>7} {'simil.':>7} {'résumé':>7}  {'jetons':>7} {'emb.':>7} {'débord.':>7}  "
+        f"{'rappel':>6} {'préc.':>6} {'qualité':>7}"
+    )
+    for r in results:
+        stages = r["stages"]
+        print(
+            f"{r['RAG_CHUNK_SIZE']:>6} {r['RAG_CHUNK_OVERLAP']:>7} {r['RAG_RESULTS']:>3} {r['SEARCH_MAX_RESULTS']:>5}  "
+            f"{r['latency_mean']:>7.2f}s {r['latency_p95']:>6.2f}s  "
+            f"{stages['search']:>6.2f}s {stages['rag_index']:>6.2f}s {stages['rag_similarity']:>6.2f}s "
+            f"{stages['summarize']:>6.2f}s  {r['prompt_tokens']:>7.0f} {r['embed_tokens']:>7.0f} {r['ctx_overflow']:>7.0%}  "
+            f"{r['recall']:>6.3f} {r['precision']:>6.3f} {r['quality']:>7.3f}"
+        )
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="Journal de requêtes JSONL")
+    parser.add_argument("--cache", default=".tuner_cache", help="Répertoire des pages enregistrées")
+    parser.add_argument("--record", action="store_true", help="Enregistre les pages via la recherche web réelle")
+    parser.add_argument("--chunk-sizes", type=int_list, default=[1024, 2048, 4096])
+    parser.add_argument("--overlaps", type=int_list, default=[0, 256, 512])
+    parser.add_argument("--k", type=int_list, default=[3, 5, 8])
+    parser.add_argument("--max-results", type=int_list, default=[3, 5, 8])
+    parser.add_argument("--embed-call-ms", type=float, default=20.0)
+    parser.add_argument("--embed-token-ms", type=float, default=0.05)
+    parser.add_argument("--prefill-token-ms", type=float, default=0.5)
+    parser.add_argument("--decode-token-ms", type=float, default=25.0)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument("--num-ctx", type=int, default=2048, help="Fenêtre de contexte Ollama (débordement signalé)")
+    parser.add_argument("--latency-budget", type=float, help="Latence moyenne maximale (secondes)")
+    parser.add_argument("--quality-target", type=float, default=0.95, help="Fraction de la meilleure qualité visée")
+    parser.add_argument("--output", help="Fichier JSON des résultats complets")
+    args = parser.parse_args()
+
+    # Les journaux INFO de chaque étape fausseraient les mesures
+    logging.disable(logging.INFO)
+
+    queries = load_queries(args.queries)
+    cache_dir = Path(args.cache)
+    if args.record:
+        await record(queries, cache_dir, max(args.max_results))
+        return
+
+    caches = {}
+    for entry in queries:
+        path = cache_path(cache_dir, entry["query"])
+        if not path.exists():
+            raise SystemExit(f"Pages non enregistrées pour [{entry['id']}] : relancer avec --record")
+        caches[entry["query"]] = json.loads(path.read_text(encoding="utf-8"))
+
+    model = LatencyModel(
+        args.embed_call_ms, args.embed_token_ms, args.prefill_token_ms,
+        args.decode_token_ms, args.output_tokens, args.num_ctx
+    )
+    grid = [
+        (size, overlap, k, pages)
+        for size, overlap, k, pages in itertools.product(args.chunk_sizes, args.overlaps, args.k, args.max_results)
+        if overlap < size
+    ]
+    print(f"{len(queries)} requêtes, {len(grid)} configurations")
+
+    results = [await evaluate(queries, caches, model, *params) for params in grid]
+    frontier = pareto_frontier(results)
+    best = recommend(frontier, args.latency_budget, args.quality_target)
+
+    print_table("Toutes les configurations (par latence)", sorted(results, key=lambda r: r["latency_mean"]))
+    print_table("Frontière de Pareto", frontier)
+    print("\nConfiguration recommandée (.env) :")
+    for key in ("RAG_CHUNK_SIZE", "RAG_CHUNK_OVERLAP", "RAG_RESULTS", "SEARCH_MAX_RESULTS"):
+        print(f"{key}={best[key]}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "results": results,
+            "frontier": frontier,
+            "recommended": best
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
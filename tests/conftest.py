@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Les modules de app/ s'importent à plat (from config import config)
+sys.path.insert(0, str(ROOT / "app"))
+
+# Valeurs par défaut de ".env sample" pour les variables obligatoires de config.py
+with open(ROOT / ".env sample", encoding="utf-8") as sample:
+    for line in sample:
+        line = line.split("#", 1)[0].strip()
+        if "=" in line:
+            key, value = line.split("=", 1)
+            os.environ.setdefault(key.strip(), value.strip().strip('"'))
+os.environ["LOGGING_DIR"] = tempfile.mkdtemp(prefix="mcp-rag-logs-")
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from chunking import OffsetChunker  # noqa: E402
+
+PIECES = ["\n\n", "\n", "\n\n\n", " \n ", "\t", "  ", " ", " ", "é", "日本"]
+
+
+def random_text(rng: random.Random) -> str:
+    """Mots, espaces multiples, sauts de ligne et mots plus longs qu'un fragment"""
+    parts = []
+    for _ in range(rng.randint(0, 300)):
+        draw = rng.random()
+        if draw < 0.1:
+            parts.append(rng.choice(PIECES))
+        elif draw < 0.13:
+            parts.append("x" * rng.randint(20, 300))
+        else:
+            parts.append("".join(rng.choice("abcdefg") for _ in range(rng.randint(1, 12))))
+        parts.append(rng.choice([" ", " ", " ", "\n", ""]))
+    return "".join(parts)
+
+
+def random_cases(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        chunk_size = rng.randint(10, 300)
+        yield random_text(rng), chunk_size, rng.randint(0, chunk_size - 1)
+
+
+def test_paragraphs_are_not_split_into_redundant_chunks():
+    text = "\n\n".join(" ".join(["word"] * 150) for _ in range(5))
+
+    starts, ends = OffsetChunker(chunk_size=500, chunk_overlap=100).boundaries(text)
+
+    assert all(previous < current for previous, current in zip(ends, ends[1:]))
+    assert all(previous < current for previous, current in zip(starts, starts[1:]))
+
+
+def test_chunks_are_bounded_trimmed_and_cover_the_text():
+    for text, chunk_size, chunk_overlap in random_cases(500):
+        starts, ends = OffsetChunker(chunk_size, chunk_overlap).boundaries(text)
+
+        covered = set()
+        for start, end in zip(starts, ends):
+            chunk = text[start:end]
+            assert 0 < len(chunk) <= chunk_size
+            assert chunk == chunk.strip()
+            covered.update(range(start, end))
+        assert all(index in covered for index, char in enumerate(text) if not char.isspace())
+        assert list(starts) == sorted(starts)
+
+
+def test_matches_recursive_character_text_splitter():
+    text_splitters = pytest.importorskip("langchain_text_splitters")
+
+    for text, chunk_size, chunk_overlap in random_cases(1000, seed=1):
+        splitter = text_splitters.RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+        assert OffsetChunker(chunk_size, chunk_overlap).split_text(text) == splitter.split_text(text)
+
+
+def test_rejects_overlap_not_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        OffsetChunker(chunk_size=100, chunk_overlap=100)
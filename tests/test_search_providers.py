@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("exa_py")
+
+from config import config  # noqa: E402
+from search_providers import SearchProvider, SearchRouter  # noqa: E402
+
+
+class FakeProvider(SearchProvider):
+    async def search(self, query, num_results):
+        return []
+
+
+class FakeExa(FakeProvider):
+    name = "exa"
+
+
+class FakeFirecrawl(FakeProvider):
+    name = "firecrawl"
+
+
+@pytest.fixture
+def providers_config(monkeypatch):
+    monkeypatch.setattr(SearchRouter, "PROVIDER_REGISTRY", {"exa": FakeExa, "firecrawl": FakeFirecrawl})
+    monkeypatch.setattr(config, "SEARCH_PROVIDERS", ["exa", "firecrawl"])
+    monkeypatch.setattr(config, "SEARCH_PROVIDER", "exa")
+    monkeypatch.setattr(config, "SEARCH_MODE", "single")
+    monkeypatch.setattr(config, "SEARCH_API_KEY", "")
+    monkeypatch.setattr(config, "EXA_API_KEY", "")
+    monkeypatch.setattr(config, "FIRECRAWL_API_KEY", "")
+    return monkeypatch
+
+
+def test_from_config_skips_provider_without_key(providers_config):
+    providers_config.setattr(config, "EXA_API_KEY", "exa-key")
+
+    router = SearchRouter.from_config()
+
+    assert [provider.name for provider in router.providers] == ["exa"]
+    assert router.providers[0].api_key == "exa-key"
+
+
+def test_search_api_key_only_applies_to_main_provider(providers_config):
+    providers_config.setattr(config, "SEARCH_API_KEY", "shared-key")
+
+    router = SearchRouter.from_config()
+
+    assert [provider.name for provider in router.providers] == ["exa"]
+    assert router.providers[0].api_key == "shared-key"
+
+
+def test_dedicated_keys_enable_every_provider(providers_config):
+    providers_config.setattr(config, "EXA_API_KEY", "exa-key")
+    providers_config.setattr(config, "FIRECRAWL_API_KEY", "firecrawl-key")
+
+    router = SearchRouter.from_config()
+
+    assert {provider.name: provider.api_key for provider in router.providers} == {
+        "exa": "exa-key",
+        "firecrawl": "firecrawl-key"
+    }
+
+
+def test_from_config_raises_without_any_key(providers_config):
+    with pytest.raises(ValueError):
+        SearchRouter.from_config()